@@ -0,0 +1,203 @@
+"""Run solution tests in worker processes with a per-test time limit."""
+
+from __future__ import annotations
+
+import ast
+import functools
+import html
+import json
+import multiprocessing
+import signal
+import threading
+from typing import Any
+
+from .runner import compare_results, execute_code
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Seconds a new worker may take to start before it is given up on.
+WORKER_START_TIMEOUT = 30
+
+# Bare literals in either JSON or Python spelling (any case), resolved by one dict lookup.
+_LITERAL_OUTPUTS = {"true": True, "false": False, "null": None}
+_NOT_LITERAL = object()
+
+
+def _decode_json(text: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+@functools.lru_cache(maxsize=8192)
+def parse_expected_output(expected_output: str) -> Any:
+    """Parse an expected output string from the problem description.
+
+    Most outputs are JSON (lists, numbers, quoted strings, true/false/null), so
+    a JSON parse is tried before the much slower ast.literal_eval. Cached
+    values are shared, so callers must not mutate them.
+    """
+    # Clean the expected output string (it often comes from problem description)
+    # Decode HTML entities (e.g., &quot; -> ") and parse it
+    decoded_output = expected_output.strip()
+    if "&" in decoded_output:
+        decoded_output = html.unescape(decoded_output)
+    # Checked first so Python-style True/False skip the failed JSON parse and literal_eval
+    literal = _LITERAL_OUTPUTS.get(decoded_output.lower(), _NOT_LITERAL)
+    if literal is not _NOT_LITERAL:
+        return literal
+    try:
+        return _decode_json(decoded_output)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(decoded_output)
+    except Exception:
+        pass
+    return expected_output
+
+
+def execute_test(
+    code: str,
+    test_input: Any,
+    class_name: str,
+    function_name: str | None,
+    expected_output: str | None = None,
+    starter_code: str = "",
+) -> dict:
+    """Execute a single test case and compare it with the expected output."""
+    try:
+        # The test_input from the web might be a list of inputs already
+        actual = execute_code(code, test_input, class_name, function_name, starter_code)
+    except (SystemExit, KeyboardInterrupt) as e:
+        # User code calling exit() must not take the worker down; SIGINT is
+        # ignored in workers, so a KeyboardInterrupt here was raised by the code.
+        return {"passed": False, "error": repr(e), "test_input": str(test_input)}
+    except Exception as e:
+        return {"passed": False, "error": str(e), "test_input": str(test_input)}
+
+    if not expected_output:
+        return {"passed": True, "input": str(test_input), "actual": str(actual)}
+    expected_val = parse_expected_output(expected_output)
+    return {
+        "passed": compare_results(actual, expected_val),
+        "input": str(test_input),
+        "actual": str(actual),
+        "expected": str(expected_val),
+    }
+
+
+def _worker_main(conn) -> None:
+    # Ctrl+C in the server's terminal is for the server; it stops the workers itself.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    conn.send(None)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        conn.send(execute_test(*job))
+
+
+class WorkerDied(Exception):
+    """The worker running a test exited before replying."""
+
+
+class WorkerPool:
+    """Worker processes that each run one test at a time.
+
+    A test's time limit starts when a worker picks it up, so time spent waiting
+    for a free worker does not count against it. A worker that overruns is
+    killed and replaced; the other workers and their tests are untouched.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        # spawn rather than fork: forking a threaded server can copy held locks.
+        self._context = multiprocessing.get_context("spawn")
+        self._cond = threading.Condition()
+        self._idle: list = []
+        # Live workers, idle or busy
+        self._count = 0
+        self._closed = False
+
+    def run(self, job: tuple, timeout: float) -> dict:
+        """Return execute_test(*job) from a worker.
+
+        Raises TimeoutError if the test runs longer than timeout seconds and
+        WorkerDied if the worker exits mid-test.
+        """
+        worker = self._acquire()
+        _, conn = worker
+        try:
+            conn.send(job)
+            finished = conn.poll(timeout)
+            result = conn.recv() if finished else None
+        except (EOFError, OSError) as e:
+            self._discard(worker)
+            raise WorkerDied(str(e) or "worker exited") from None
+        if not finished:
+            self._discard(worker)
+            raise TimeoutError(f"test exceeded {timeout}s")
+        with self._cond:
+            if not self._closed:
+                self._idle.append(worker)
+                self._cond.notify()
+                return result
+        self._discard(worker)
+        return result
+
+    def close(self) -> None:
+        """Stop the idle workers; busy ones are stopped when their test ends."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for worker in idle:
+            self._discard(worker)
+
+    def _acquire(self):
+        with self._cond:
+            while not self._idle and self._count >= self.max_workers and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                raise RuntimeError("worker pool is closed")
+            if self._idle:
+                return self._idle.pop()
+            self._count += 1
+        try:
+            return self._start_worker()
+        except BaseException:
+            with self._cond:
+                self._count -= 1
+                self._cond.notify()
+            raise
+
+    def _start_worker(self):
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        process.start()
+        child_conn.close()
+        # Wait out the interpreter start-up so it is not billed to the first test
+        try:
+            ready = conn.poll(WORKER_START_TIMEOUT) and conn.recv() is None
+        except (EOFError, OSError):
+            ready = False
+        if not ready:
+            process.kill()
+            process.join()
+            conn.close()
+            raise WorkerDied("worker did not start")
+        return process, conn
+
+    def _discard(self, worker) -> None:
+        process, conn = worker
+        process.kill()
+        process.join()
+        conn.close()
+        with self._cond:
+            self._count -= 1
+            self._cond.notify()
@@ -3,24 +3,147 @@
 from __future__ import annotations
 
 import json
+import mmap
+import os
+import pickle
+import threading
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Per-problem fields no caller reads; solutions alone is ~40% of problems.json.
+UNUSED_FIELDS = ("solutions",)
+
+# problems.json path -> (mtime, id index)
+_CACHE: dict[Path, tuple[float, dict[str, dict]]] = {}
+# Serializes (re)loads so concurrent server threads parse the file only once.
+_CACHE_LOCK = threading.Lock()
+
+
+def _problem_key(problem: dict) -> str:
+    return str(problem.get("id") or problem.get("frontend_id"))
+
+
+def build_index(problems: Iterable[dict]) -> dict[str, dict]:
+    """Map each problem's lookup key to its record (first occurrence wins)."""
+    index: dict[str, dict] = {}
+    for problem in problems:
+        index.setdefault(_problem_key(problem), problem)
+    return index
+
+
+def _read_json(path: Path):
+    """Parse a JSON file, letting orjson read straight from a memory map."""
+    if orjson is None:
+        return json.loads(path.read_bytes().decode("utf-8"))
+    with path.open("rb") as handle:
+        try:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped; let orjson report the error.
+            return orjson.loads(handle.read())
+        with mapped, memoryview(mapped) as view:
+            return orjson.loads(view)
+
+
+def load_problem_index(data_dir: Path) -> dict[str, dict]:
+    """Return {id: problem} for data/problems.json, without UNUSED_FIELDS.
+
+    Built once per file change: from problems.pkl when it is up to date,
+    otherwise by streaming the JSON, after which the pickle is rewritten.
+    """
+    problems_file = data_dir / "problems.json"
+    if not problems_file.exists():
+        raise FileNotFoundError(f"Missing dataset file: {problems_file}")
+
+    mtime = problems_file.stat().st_mtime
+    cached = _CACHE.get(problems_file)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with _CACHE_LOCK:
+        cached = _CACHE.get(problems_file)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        index = _read_pickle(data_dir / "problems.pkl", mtime)
+        if index is None:
+            index = build_index(iter_problems(data_dir, drop_fields=UNUSED_FIELDS))
+            _write_pickle(data_dir / "problems.pkl", index)
+        _CACHE[problems_file] = (mtime, index)
+        return index
+
+
+def _read_pickle(cache_file: Path, source_mtime: float) -> dict[str, dict] | None:
+    """Load the pickled index if it is not older than the source."""
+    try:
+        if cache_file.stat().st_mtime < source_mtime:
+            return None
+        with cache_file.open("rb") as handle:
+            index = pickle.load(handle)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    # Pickles from older versions held a (problems, index) pair
+    return index if isinstance(index, dict) else None
+
+
+def _write_pickle(cache_file: Path, index: dict[str, dict]) -> None:
+    """Atomically write the index; a failed write only costs the speedup."""
+    tmp_file = cache_file.with_suffix(".pkl.tmp")
+    try:
+        with tmp_file.open("wb") as handle:
+            pickle.dump(index, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        tmp_file.unlink(missing_ok=True)
+
 
 def load_problems(data_dir: Path) -> list[dict]:
     """Load all problems from data/problems.json."""
     problems_file = data_dir / "problems.json"
     if not problems_file.exists():
         raise FileNotFoundError(f"Missing dataset file: {problems_file}")
-
-    with problems_file.open("r", encoding="utf-8") as handle:
-        return json.load(handle)
+    return _read_json(problems_file)
 
 
 def load_problem(problem_id: str, data_dir: Path) -> dict:
     """Load one problem by id/frontend_id."""
-    normalized = str(problem_id)
-    for problem in load_problems(data_dir):
-        pid = str(problem.get("id") or problem.get("frontend_id"))
-        if pid == normalized:
-            return problem
-    raise KeyError(f"Problem not found: {problem_id}")
+    try:
+        return load_problem_index(data_dir)[str(problem_id)]
+    except KeyError:
+        raise KeyError(f"Problem not found: {problem_id}") from None
+
+
+def iter_problems(data_dir: Path, drop_fields: Iterable[str] = ()) -> Iterator[dict]:
+    """Yield problems one at a time without keeping the whole dataset in memory.
+
+    Streams with ijson when available; otherwise parses the file once without
+    caching it. Keys in drop_fields are removed from every record.
+    """
+    problems_file = data_dir / "problems.json"
+    if not problems_file.exists():
+        raise FileNotFoundError(f"Missing dataset file: {problems_file}")
+
+    drop_fields = tuple(drop_fields)
+    # Imported here: the CLI only needs single lookups and never loads it.
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+    if ijson is not None:
+        handle = problems_file.open("rb")
+        problems = ijson.items(handle, "item", use_float=True)
+    else:
+        handle = None
+        problems = iter(_read_json(problems_file))
+    try:
+        for problem in problems:
+            for field in drop_fields:
+                problem.pop(field, None)
+            yield problem
+    finally:
+        if handle is not None:
+            handle.close()
@@ -1,28 +1,45 @@
 from __future__ import annotations
 
 import ast
+import functools
 import re
-from collections import defaultdict
+from itertools import islice
+from collections import Counter, defaultdict, deque
 from typing import Any, Dict, List, Optional
 
 
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+# A line that opens a block (e.g. a bare "def ...:" signature), optionally commented
+_BLOCK_OPENER_RE = re.compile(r":\s*(#.*)?$")
+# Match Output: followed by value until newline or next Example/Constraint
+_OUTPUT_RE = re.compile(r"Output:\s*(.*?)(?:\s*Explanation|Example|Constraints|$)", re.DOTALL)
+
+
 def extract_expected_outputs(content: str) -> list[str]:
     """Extract expected outputs from problem content HTML."""
     outputs = []
     # Match patterns like "Output: [0,1]" or "<strong>Output:</strong> [0,1]"
     # Clean HTML tags first
-    text = re.sub(r"<[^>]+>", " ", content)
-    # Match Output: followed by value until newline or next Example/Constraint
-    pattern = re.compile(r"Output:\s*(.*?)(?:\s*Explanation|Example|Constraints|$)", re.DOTALL)
-    for match in pattern.finditer(text):
+    text = _HTML_TAG_RE.sub(" ", content)
+    for match in _OUTPUT_RE.finditer(text):
         val = match.group(1).strip()
         if val:
             # Try to extract just the first line/block of output
-            val = val.split("\n")[0].strip()
+            newline = val.find("\n")
+            if newline != -1:
+                val = val[:newline].rstrip()
             outputs.append(val)
     return outputs
 
 
+try:
+    from itertools import batched as _batched
+except ImportError:  # Python < 3.12
+    def _batched(iterable, n):
+        it = iter(iterable)
+        return iter(lambda: tuple(islice(it, n)), ())
+
+
 def parse_test_cases(test_cases_str: str, arg_count: int) -> list[list[str]]:
     """Parse test cases from string into groups of arguments."""
     if not test_cases_str:
@@ -32,10 +49,7 @@ def parse_test_cases(test_cases_str: str, arg_count: int) -> list[list[str]]:
         return []
 
     # If we have arg_count, group lines
-    results = []
-    for i in range(0, len(lines), arg_count):
-        results.append(lines[i : i + arg_count])
-    return results
+    return [list(group) for group in _batched(lines, max(arg_count, 1))]
 
 
 def get_python3_starter(problem: dict) -> str:
@@ -46,14 +60,27 @@ def get_python3_starter(problem: dict) -> str:
     return starter
 
 
-def make_compilable_starter(code: str) -> str:
-    """Ensure starter code parses even when dataset snippet omits method body."""
+def _ends_with_block_opener(code: str) -> bool:
+    """Whether the last non-blank, non-comment line ends with a colon."""
+    for line in reversed(code.splitlines()):
+        stripped = line.strip()
+        if stripped and not stripped.startswith("#"):
+            return _BLOCK_OPENER_RE.search(stripped) is not None
+    return False
+
+
+@functools.lru_cache(maxsize=256)
+def _make_compilable_with_tree(code: str) -> tuple[str, Optional[ast.Module]]:
+    """Return the compilable starter and its AST, if one was parsed along the way."""
     candidate = (code or "").rstrip() + "\n"
     if "List[" in candidate and "from typing import List" not in candidate:
         candidate = "from typing import List\n\n" + candidate
+    if not _ends_with_block_opener(candidate):
+        # Appending a body can only help after a trailing "...:" line, so
+        # there is nothing to validate or repair.
+        return candidate, None
     try:
-        ast.parse(candidate)
-        return candidate
+        return candidate, ast.parse(candidate)
     except SyntaxError:
         # Many dataset snippets end at a function signature line.
         lines = [line.rstrip("\n") for line in candidate.splitlines()]
@@ -71,27 +98,63 @@ def make_compilable_starter(code: str) -> str:
         fixed = candidate + f"{indent}pass\n"
         # If this still fails, return original so user can see untouched starter.
         try:
-            ast.parse(fixed)
-            return fixed
+            return fixed, ast.parse(fixed)
         except SyntaxError:
-            return candidate
+            return candidate, None
+
+
+def make_compilable_starter(code: str) -> str:
+    """Ensure starter code parses even when dataset snippet omits method body."""
+    return _make_compilable_with_tree(code)[0]
+
+
+def _is_public_function(node: ast.stmt) -> bool:
+    return isinstance(node, ast.FunctionDef) and not node.name.startswith("__")
 
 
+def _find_primary_method(tree: ast.Module) -> Optional[ast.FunctionDef]:
+    """Return the first non-dunder function at module level, else in a top-level class body."""
+    for node in tree.body:
+        if _is_public_function(node):
+            return node
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            for child in node.body:
+                if _is_public_function(child):
+                    return child
+    return None
+
+
+@functools.lru_cache(maxsize=256)
 def get_arg_count(starter_code: str) -> int:
     """Parse starter code to find the number of arguments in the primary method."""
-    compilable = make_compilable_starter(starter_code)
+    compilable, tree = _make_compilable_with_tree(starter_code)
     try:
-        tree = ast.parse(compilable)
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef) and not node.name.startswith("__"):
-                # Count arguments excluding 'self'
-                args = [arg for arg in node.args.args if arg.arg != "self"]
-                return len(args)
+        if tree is None:
+            tree = ast.parse(compilable)
+        node = _find_primary_method(tree)
+        if node is not None:
+            # Count arguments excluding 'self'
+            args = [arg for arg in node.args.args if arg.arg != "self"]
+            return len(args)
     except Exception:
         pass
     return 1
 
 
+@functools.lru_cache(maxsize=256)
+def get_method_name(starter_code: str) -> Optional[str]:
+    """Name of the method the starter code asks the solver to implement."""
+    compilable, tree = _make_compilable_with_tree(starter_code)
+    try:
+        if tree is None:
+            tree = ast.parse(compilable)
+    except SyntaxError:
+        return None
+    node = _find_primary_method(tree)
+    return node.name if node is not None else None
+
+
 class ListNode:
     def __init__(self, val: int = 0, next: Optional[ListNode] = None):
         self.val = val
@@ -108,17 +171,18 @@ class ListNode:
     def __eq__(self, other: Any) -> bool:
         if not isinstance(other, ListNode):
             return False
-        return str(self) == str(other)
+        a, b = self, other
+        while a is not None and b is not None:
+            if a.val != b.val:
+                return False
+            a, b = a.next, b.next
+        return a is None and b is None
 
 
 def list_to_list_node(values: List[int]) -> Optional[ListNode]:
-    if not values:
-        return None
-    head = ListNode(values[0])
-    curr = head
-    for val in values[1:]:
-        curr.next = ListNode(val)
-        curr = curr.next
+    head = None
+    for val in reversed(values or []):
+        head = ListNode(val, head)
     return head
 
 
@@ -136,9 +200,9 @@ class TreeNode:
     def __repr__(self) -> str:
         # Simple BFS representation for comparison
         result = []
-        queue = [self]
+        queue = deque([self])
         while queue:
-            node = queue.pop(0)
+            node = queue.popleft()
             if node:
                 result.append(str(node.val))
                 queue.append(node.left)
@@ -154,6 +218,16 @@ class TreeNode:
 def to_env_list_node(values: List[int], node_class: Any) -> Any:
     if not values:
         return None
+    # Build back to front so each node gets its successor at construction time
+    try:
+        head = None
+        for val in reversed(values):
+            head = node_class(val, next=head)
+        return head
+    except TypeError:
+        # node_class does not accept a next= argument
+        pass
+
     head = node_class(values[0])
     curr = head
     for val in values[1:]:
@@ -166,10 +240,10 @@ def to_env_tree_node(values: List[Optional[int]], node_class: Any) -> Any:
     if not values or values[0] is None:
         return None
     root = node_class(values[0])
-    queue = [root]
+    queue = deque([root])
     i = 1
     while queue and i < len(values):
-        node = queue.pop(0)
+        node = queue.popleft()
         if i < len(values) and values[i] is not None:
             node.left = node_class(values[i])
             queue.append(node.left)
@@ -194,9 +268,9 @@ def tree_node_to_list(node: Any) -> List[Optional[int]]:
     if not node:
         return []
     result = []
-    queue = [node]
+    queue = deque([node])
     while queue:
-        curr = queue.pop(0)
+        curr = queue.popleft()
         if curr:
             result.append(curr.val)
             queue.append(curr.left)
@@ -208,32 +282,169 @@ def tree_node_to_list(node: Any) -> List[Optional[int]]:
     return result
 
 
+@functools.lru_cache(maxsize=64)
+def _compile_solution(code: str) -> Any:
+    """Compile solution source once; every test case re-executes the same code object."""
+    return compile(code, "<solution>", "exec")
+
+
+# (code, class_name, function_name) -> per-parameter conversion kinds
+_ARG_KINDS_CACHE: Dict[tuple, Optional[tuple]] = {}
+_ARG_KINDS_CACHE_SIZE = 256
+
+
+def _resolve_arg_kinds(func: Any, safe_globals: dict) -> Optional[tuple]:
+    """Classify each parameter of func as "list", "tree" or None from its type hints."""
+    import inspect
+    import typing
+
+    try:
+        # Use get_type_hints on the method
+        hints = typing.get_type_hints(func, globalns=safe_globals)
+        # Get parameter names from the function signature
+        param_names = list(inspect.signature(func).parameters)
+    except Exception:
+        return None
+
+    # Get the classes from safe_globals to match redefined classes in code
+    env_list_node = safe_globals.get("ListNode", ListNode)
+    env_tree_node = safe_globals.get("TreeNode", TreeNode)
+
+    # Filter out 'self' if present in sig
+    if param_names and param_names[0] == "self":
+        param_names = param_names[1:]
+
+    kinds = []
+    for param_name in param_names:
+        hint = hints.get(param_name, Any)
+
+        # Handle Optional[T] or T | None
+        origin = typing.get_origin(hint)
+        if origin is typing.Union or (hasattr(typing, "UnionType") and origin is typing.UnionType):
+            # Extract the non-None type
+            args_types = typing.get_args(hint)
+            hint = next((t for t in args_types if t is not type(None)), Any)
+
+        # We check if hint is our ListNode OR the one from the environment
+        if hint is ListNode or hint is env_list_node:
+            kinds.append("list")
+        elif hint is TreeNode or hint is env_tree_node:
+            kinds.append("tree")
+        else:
+            kinds.append(None)
+    return tuple(kinds)
+
+
+def _get_arg_kinds(
+    code: str,
+    class_name: str,
+    function_name: str,
+    func: Any,
+    safe_globals: dict,
+) -> Optional[tuple]:
+    """Resolve argument kinds once per solution instead of once per test case."""
+    key = (code, class_name, function_name)
+    if key in _ARG_KINDS_CACHE:
+        return _ARG_KINDS_CACHE[key]
+    kinds = _resolve_arg_kinds(func, safe_globals)
+    if len(_ARG_KINDS_CACHE) >= _ARG_KINDS_CACHE_SIZE:
+        _ARG_KINDS_CACHE.clear()
+    _ARG_KINDS_CACHE[key] = kinds
+    return kinds
+
+
+def _convert_args(args: list, kinds: tuple, safe_globals: dict) -> list:
+    """Build ListNode/TreeNode arguments using the classes the solution expects."""
+    env_list_node = safe_globals.get("ListNode", ListNode)
+    env_tree_node = safe_globals.get("TreeNode", TreeNode)
+
+    converted_args = []
+    for kind, arg_val in zip(kinds, args):
+        if kind == "list" and isinstance(arg_val, list):
+            converted_args.append(to_env_list_node(arg_val, env_list_node))
+        elif kind == "tree" and isinstance(arg_val, list):
+            converted_args.append(to_env_tree_node(arg_val, env_tree_node))
+        else:
+            converted_args.append(arg_val)
+    return converted_args
+
+
+# Handle LeetCode-specific literals
+_LEETCODE_WORDS = {"true": "True", "false": "False", "null": "None"}
+
+
+def _parse_grouped_args(test_input: Any) -> list:
+    """Parse a group of argument strings, with one literal_eval for the whole group."""
+    if all(isinstance(inp, str) for inp in test_input):
+        source = ", ".join(_LEETCODE_WORDS.get(inp.lower(), inp) for inp in test_input)
+        try:
+            parsed = ast.literal_eval(f"({source},)")
+        except (ValueError, SyntaxError):
+            parsed = None
+        # A count mismatch means an argument contained a bare comma or
+        # was not a literal on its own; parse one by one instead.
+        if isinstance(parsed, tuple) and len(parsed) == len(test_input):
+            return list(parsed)
+
+    args = []
+    for inp in test_input:
+        if isinstance(inp, str):
+            try:
+                # Try to parse each string argument
+                word = _LEETCODE_WORDS.get(inp.lower())
+                args.append(ast.literal_eval(word or inp))
+            except (ValueError, SyntaxError):
+                args.append(inp)
+        else:
+            args.append(inp)
+    return args
+
+
+_SAFE_GLOBALS_TEMPLATE: Optional[dict] = None
+
+
+def _get_safe_globals() -> dict:
+    """Return a fresh copy of the globals a solution runs with.
+
+    The template is built on first use only.
+    """
+    global _SAFE_GLOBALS_TEMPLATE
+    if _SAFE_GLOBALS_TEMPLATE is None:
+        import typing
+
+        _SAFE_GLOBALS_TEMPLATE = {
+            "ListNode": ListNode,
+            "TreeNode": TreeNode,
+            "Optional": typing.Optional,
+            "List": typing.List,
+            "Dict": typing.Dict,
+            "Set": typing.Set,
+            "Tuple": typing.Tuple,
+            "Any": typing.Any,
+            "Union": typing.Union,
+            "defaultdict": defaultdict,
+            "__builtins__": __builtins__,
+        }
+    return _SAFE_GLOBALS_TEMPLATE.copy()
+
+
 def execute_code(
     code: str,
     test_input: Any,
     class_name: str = "Solution",
     function_name: str | None = None,
+    starter_code: str = "",
 ) -> Any:
-    """Execute code against test input."""
-    # Setup environment
-    import typing
+    """Execute code against test input.
 
-    safe_globals = {
-        "ListNode": ListNode,
-        "TreeNode": TreeNode,
-        "Optional": typing.Optional,
-        "List": typing.List,
-        "Dict": typing.Dict,
-        "Set": typing.Set,
-        "Tuple": typing.Tuple,
-        "Any": typing.Any,
-        "Union": typing.Union,
-        "defaultdict": defaultdict,
-        "__builtins__": __builtins__,
-    }
+    The method to call is function_name if the class has it, else the one the
+    starter code declares, else the first public method in definition order.
+    """
+    # Setup environment
+    safe_globals = _get_safe_globals()
 
     # Execute solution code
-    exec(code, safe_globals)
+    exec(_compile_solution(code), safe_globals)
 
     if class_name not in safe_globals:
         raise ValueError(f"Class {class_name} not found in code")
@@ -255,92 +466,44 @@ def execute_code(
             args = [test_input]
     elif isinstance(test_input, (list, tuple)):
         # Already grouped arguments
-        args = []
-        for inp in test_input:
-            if isinstance(inp, str):
-                try:
-                    # Try to parse each string argument
-                    # Handle LeetCode-specific booleans
-                    if inp.lower() == "true":
-                        args.append(True)
-                    elif inp.lower() == "false":
-                        args.append(False)
-                    elif inp.lower() == "null":
-                        args.append(None)
-                    else:
-                        args.append(ast.literal_eval(inp))
-                except (ValueError, SyntaxError):
-                    args.append(inp)
-            else:
-                args.append(inp)
+        args = _parse_grouped_args(test_input)
     else:
         args = [test_input]
 
     # Find the function to call
+    if not (function_name and hasattr(instance, function_name)):
+        entry_name = get_method_name(starter_code) if starter_code else None
+        if entry_name and hasattr(instance, entry_name):
+            function_name = entry_name
     if function_name and hasattr(instance, function_name):
         func = getattr(instance, function_name)
     else:
-        # Find first public method
-        for name in dir(instance):
-            if not name.startswith("_"):
-                attr = getattr(instance, name)
-                if callable(attr):
-                    func = attr
-                    function_name = name
-                    break
-        else:
+        import inspect
+
+        # Find first public method, in definition order (base classes last).
+        # Nested classes are callable too, so methods are matched by type.
+        function_name = next(
+            (
+                name
+                for klass in sol_class.__mro__[:-1]
+                for name, attr in vars(klass).items()
+                if not name.startswith("_")
+                and (inspect.isfunction(attr) or isinstance(attr, (staticmethod, classmethod)))
+            ),
+            None,
+        )
+        if function_name is None:
             raise ValueError(f"No public method found in {class_name}")
+        func = getattr(instance, function_name)
 
     # Convert args based on type hints if possible
-    import typing
-    try:
-        # Use get_type_hints on the method
-        hints = typing.get_type_hints(func, globalns=safe_globals)
-        
-        # Get the classes from safe_globals to match redefined classes in code
-        env_list_node = safe_globals.get("ListNode", ListNode)
-        env_tree_node = safe_globals.get("TreeNode", TreeNode)
-
-        # Get parameter names from the function signature
-        import inspect
-        sig = inspect.signature(func)
-        
-        converted_args = []
-        param_items = list(sig.parameters.items())
-        # Filter out 'self' if present in sig
-        if param_items and param_items[0][0] == 'self':
-            param_items = param_items[1:]
-
-        for i, (param_name, param) in enumerate(param_items):
-            if i >= len(args):
-                break
-            
-            arg_val = args[i]
-            hint = hints.get(param_name, Any)
-            
-            # Handle Optional[T] or T | None
-            origin = typing.get_origin(hint)
-            if origin is typing.Union or (hasattr(typing, "UnionType") and origin is typing.UnionType):
-                # Extract the non-None type
-                args_types = typing.get_args(hint)
-                hint = next((t for t in args_types if t is not type(None)), Any)
-
-            # Conversion based on hint
-            # We check if hint is our ListNode OR the one from the environment
-            if (hint is ListNode or hint is env_list_node) and isinstance(arg_val, list):
-                # We need to use the constructor of the class that the function expects
-                # But our list_to_list_node uses our ListNode. 
-                # Let's make a more generic converter.
-                converted_args.append(to_env_list_node(arg_val, env_list_node))
-            elif (hint is TreeNode or hint is env_tree_node) and isinstance(arg_val, list):
-                converted_args.append(to_env_tree_node(arg_val, env_tree_node))
-            else:
-                converted_args.append(arg_val)
-        
-        args = converted_args
-    except Exception as e:
-        # Fallback to original args if hints fail
-        pass
+    kinds = _get_arg_kinds(code, class_name, function_name, func, safe_globals)
+    if kinds is not None:
+        try:
+            args = _convert_args(args, kinds, safe_globals)
+        except Exception:
+            # Fallback to original args if conversion fails
+            pass
 
     # Call the function
     result = func(*args)
@@ -355,6 +518,22 @@ def execute_code(
     return result
 
 
+def _same_multiset(actual: list, expected: list) -> bool:
+    """Order-insensitive equality under ==, with exact (not tolerant) numbers.
+
+    O(n) via Counter; unhashable items fall back to sorting. Mixed types that
+    cannot be ordered, such as [1, "a"], still match a permutation of themselves.
+    """
+    try:
+        return Counter(actual) == Counter(expected)
+    except TypeError:
+        pass
+    try:
+        return sorted(actual) == sorted(expected)
+    except (TypeError, ValueError):
+        return False
+
+
 def compare_results(actual: Any, expected: Any) -> bool:
     """Compare actual result with expected result with smart matching."""
     if actual == expected:
@@ -368,29 +547,24 @@ def compare_results(actual: Any, expected: Any) -> bool:
     if isinstance(actual, list) and isinstance(expected, list):
         if len(actual) != len(expected):
             return False
-        
+
         # Try exact order comparison first
         if all(compare_results(a, e) for a, e in zip(actual, expected)):
             return True
-            
-        # Try sorted comparison (for problems where order doesn't matter)
-        try:
-            # Only if they are simple lists (not nested)
-            if all(not isinstance(x, (list, dict)) for x in actual):
-                return sorted(actual) == sorted(expected)
-        except (TypeError, ValueError):
-            pass
 
-        # Handle list of lists (e.g., group anagrams) - compare as sets of sorted lists
-        try:
-            if all(isinstance(x, list) for x in actual) and all(isinstance(x, list) for x in expected):
-                actual_sorted = [sorted(a) for a in actual]
-                expected_sorted = [sorted(e) for e in expected]
-                actual_sorted.sort()
-                expected_sorted.sort()
-                if actual_sorted == expected_sorted:
-                    return True
-        except (TypeError, ValueError):
-            pass
+        # Only simple (not nested) lists: compare as multisets
+        # (for problems where order doesn't matter)
+        if all(not isinstance(x, (list, dict)) for x in actual):
+            return _same_multiset(actual, expected)
+
+        # Handle list of lists (e.g., group anagrams) - compare as multisets of sorted lists
+        if all(isinstance(x, list) for x in actual) and all(isinstance(x, list) for x in expected):
+            try:
+                return _same_multiset(
+                    [tuple(sorted(a)) for a in actual],
+                    [tuple(sorted(e)) for e in expected],
+                )
+            except (TypeError, ValueError):
+                pass
 
     return False
@@ -1,31 +1,79 @@
 """LeetCode Helper - Pure Python HTTP server."""
 import http.server
+import gzip
+import hashlib
 import html
 import json
+import logging
+import logging.handlers
 import os
-import socketserver
+import queue
 import sys
 import threading
+import time
 import urllib.parse
 import mimetypes
-import ast
-import requests
+import collections
+import contextlib
+import functools
+from datetime import datetime
 from pathlib import Path
-from leetcode_helper.runner import execute_code, get_arg_count, make_compilable_starter, get_python3_starter, parse_test_cases, extract_expected_outputs, compare_results
+from leetcode_helper.problem_store import load_problem_index
+from leetcode_helper.executor import WorkerDied, WorkerPool
+from leetcode_helper.runner import get_arg_count, make_compilable_starter, get_python3_starter, parse_test_cases, extract_expected_outputs
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BASE_DIR = Path(__file__).resolve().parent
+
 # Load environment variables
-load_dotenv()
+load_dotenv(BASE_DIR / ".env")
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
 AURORA_MODEL = os.getenv("OPENROUTER_MODEL", "google/gemini-2.5-flash")
 
+log = logging.getLogger(__name__)
+
 
 # Configuration
 PORT = 8888
-DATA_DIR = Path("data")
-STATIC_DIR = Path("static")
-SOLUTIONS_DIR = Path("solutions")
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+# Largest JSON request body accepted; bigger ones get 413 without being read.
+MAX_REQUEST_BODY = 4 * 1024 * 1024
+DATA_DIR = BASE_DIR / "data"
+STATIC_DIR = BASE_DIR / "static"
+SOLUTIONS_DIR = BASE_DIR / "solutions"
+
+
+def _json_default(obj):
+    """Encode sets (e.g. roadmap completedDays) as sorted lists."""
+    if isinstance(obj, (set, frozenset)):
+        try:
+            return sorted(obj)
+        except TypeError:
+            return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode_json(data, indent=False):
+    """Serialize to UTF-8 JSON bytes (orjson when installed)."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(data, default=_json_default, option=option)
+    return json.dumps(data, ensure_ascii=False, indent=2 if indent else None, default=_json_default).encode("utf-8")
+
+
+def decode_json(data):
+    """Parse JSON from bytes or str; errors are json.JSONDecodeError either way."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+    return json.loads(data)
 
 
 # Load data at module level for sharing across requests
@@ -33,98 +81,715 @@ def load_problems_index():
     """Load the lightweight problems index."""
     index_file = DATA_DIR / "problems_index.json"
     if index_file.exists():
-        with open(index_file, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return decode_json(index_file.read_bytes())
     return []
 
 
-def load_full_problem(problem_id, cache):
+def get_problem_index():
+    """Return {id: problem} for problems.json, or {} when the dataset is missing."""
+    try:
+        return load_problem_index(DATA_DIR)
+    except FileNotFoundError:
+        return {}
+
+
+def load_full_problem(problem_id):
     """Load a single problem from the full problems.json."""
-    if problem_id in cache:
-        return cache[problem_id]
+    return get_problem_index().get(str(problem_id))
 
-    problems_file = DATA_DIR / "problems.json"
-    if not problems_file.exists():
-        return None
 
-    with open(problems_file, "r", encoding="utf-8") as f:
-        problems = json.load(f)
+PROGRESS_FILE = DATA_DIR / "progress.json"
+# Changes since the last snapshot, one JSON object per line: {"path": [...], "value": ...};
+# an entry without "value" removes the key.
+PROGRESS_LOG_FILE = DATA_DIR / "progress_log.jsonl"
+# Once the log grows past this it is folded back into progress.json.
+PROGRESS_LOG_COMPACT_BYTES = 1024 * 1024
 
-    for p in problems:
-        pid = str(p.get("id") or p.get("frontend_id"))
-        cache[pid] = p
 
-    return cache.get(problem_id)
+def default_roadmap():
+    """Roadmap state for a user who has not started it yet."""
+    return {"currentDay": 1, "currentPhase": 1, "completedDays": set(), "unlockedPhases": [1]}
 
 
 def load_progress():
-    """Load user progress from file."""
-    progress_file = DATA_DIR / "progress.json"
-    if progress_file.exists():
-        with open(progress_file, "r", encoding="utf-8") as f:
-            return json.load(f)
-    # New structure: {"solved": {"problem_id": {"code": "...", "timestamp": "...", "passed": True}}}
-    return {"solved": {}, "submissions": {}, "roadmap": {"currentDay": 1, "currentPhase": 1, "completedDays": [], "unlockedPhases": [1]}}
+    """Load user progress from the progress.json snapshot plus its change log.
+
+    Every top-level section is present afterwards, so handlers can index
+    progress["solved"], ["submissions"], ["hints"] and ["roadmap"] directly.
+    """
+    if PROGRESS_FILE.exists():
+        progress = decode_json(PROGRESS_FILE.read_bytes())
+    else:
+        # New structure: {"solved": {"problem_id": {"code": "...", "timestamp": "...", "passed": True}}}
+        progress = {}
+    if PROGRESS_LOG_FILE.exists():
+        for line in PROGRESS_LOG_FILE.read_bytes().splitlines():
+            try:
+                change = decode_json(line)
+            except json.JSONDecodeError:
+                # A torn last line from a crash mid-append
+                break
+            _apply_progress_change(progress, change)
+    for section in ("solved", "submissions", "hints"):
+        progress.setdefault(section, {})
+    roadmap = progress.setdefault("roadmap", default_roadmap())
+    # A set in memory; encode_json writes it back as a sorted list
+    roadmap["completedDays"] = set(roadmap.get("completedDays", ()))
+    return progress
+
+
+def _apply_progress_change(progress, change):
+    # JSON object keys are strings, so an int problem_id replays under the
+    # same key the snapshot stores it as.
+    *parents, key = (str(part) for part in change["path"])
+    target = progress
+    for parent in parents:
+        target = target.setdefault(parent, {})
+    if "value" in change:
+        target[key] = change["value"]
+    else:
+        target.pop(key, None)
+
+
+# Bumped on every progress save; invalidates responses that embed solved status.
+progress_version = 0
+# Held while mutating progress and while the writer serializes it.
+progress_lock = threading.Lock()
+# Seconds the writer waits after a change so a burst of updates is written once.
+PROGRESS_SAVE_DELAY = 0.25
+
+_REMOVED = object()
+# Encoded log lines recorded but not yet appended; guarded by progress_lock.
+_pending_progress_changes = []
+_progress_dirty = threading.Event()
+_progress_write_lock = threading.Lock()
+_progress_writer = None
+
+
+def record_progress_change(path, value=_REMOVED):
+    """Queue a change to progress[path...] for the log; call with progress_lock held.
+
+    Logging the value at the path rather than the whole document keeps each
+    save O(size of the change). Omit value to record a removal.
+    """
+    change = {"path": list(path)}
+    if value is not _REMOVED:
+        change["value"] = value
+    _pending_progress_changes.append(encode_json(change) + b"\n")
+
+
+def save_progress(progress, flush=False):
+    """Mark progress as changed; a background thread writes it to disk shortly after.
+
+    With flush=True the change is written before returning, for updates that
+    must not be lost if the server stops right away.
+    """
+    global progress_version, _progress_writer
+    progress_version += 1
+    if flush:
+        # Write unconditionally: the writer may already have cleared the dirty
+        # flag for a write that started before this change was recorded.
+        # write_progress waits for that write and then drains what is left.
+        write_progress(progress)
+        return
+    _progress_dirty.set()
+    if _progress_writer is None:
+        with _progress_write_lock:
+            if _progress_writer is None:
+                _progress_writer = threading.Thread(target=_progress_writer_loop, daemon=True)
+                _progress_writer.start()
+
+
+def write_progress(progress, compact=False):
+    """Append pending changes to the log, folding it into progress.json when large."""
+    with _progress_write_lock:
+        with progress_lock:
+            lines = b"".join(_pending_progress_changes)
+            _pending_progress_changes.clear()
+            # Snapshot in the same critical section so it matches log + lines exactly
+            snapshot = None
+            if compact or _progress_log_size() + len(lines) >= PROGRESS_LOG_COMPACT_BYTES:
+                snapshot = encode_json(progress, indent=True)
+        if lines:
+            with PROGRESS_LOG_FILE.open("ab") as log:
+                log.write(lines)
+        if snapshot is not None:
+            # Replaying a complete log over the new snapshot is a no-op, so a
+            # crash between these steps loses nothing.
+            tmp_file = PROGRESS_FILE.with_suffix(".json.tmp")
+            tmp_file.write_bytes(snapshot)
+            os.replace(tmp_file, PROGRESS_FILE)
+            PROGRESS_LOG_FILE.unlink(missing_ok=True)
+
+
+def _progress_log_size():
+    try:
+        return PROGRESS_LOG_FILE.stat().st_size
+    except OSError:
+        return 0
 
 
-def save_progress(progress):
-    """Save user progress to file."""
-    progress_file = DATA_DIR / "progress.json"
-    with open(progress_file, "w", encoding="utf-8") as f:
-        json.dump(progress, f, indent=2)
+def flush_progress(compact=False):
+    """Write pending progress changes now (used on shutdown and for flush=True saves)."""
+    if _progress_dirty.is_set() or compact:
+        _progress_dirty.clear()
+        write_progress(progress, compact=compact)
+
+
+def _progress_writer_loop():
+    while True:
+        _progress_dirty.wait()
+        time.sleep(PROGRESS_SAVE_DELAY)
+        # Clear before writing so changes made during the write trigger another one.
+        _progress_dirty.clear()
+        try:
+            write_progress(progress)
+        except Exception:
+            # Keep the thread alive: nothing restarts it, and later saves rely on it
+            log.exception("Failed to save progress")
 
 
 def load_quizzes():
     """Load quizzes from file."""
     quizzes_file = DATA_DIR / "quizzes.json"
     if quizzes_file.exists():
-        with open(quizzes_file, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return decode_json(quizzes_file.read_bytes())
     return {}
 
 
+_quizzes_write_lock = threading.Lock()
+
+
 def save_quizzes(quizzes):
-    """Save quizzes to file."""
+    """Save quizzes to file, atomically so a crash mid-write keeps the old file."""
     quizzes_file = DATA_DIR / "quizzes.json"
-    with open(quizzes_file, "w", encoding="utf-8") as f:
-        json.dump(quizzes, f, indent=2)
+    tmp_file = quizzes_file.with_suffix(".json.tmp")
+    # Concurrent quiz generations would otherwise share the temp file, and
+    # encoding inside the lock keeps an older snapshot from replacing a newer one.
+    with _quizzes_write_lock:
+        tmp_file.write_bytes(encode_json(quizzes, indent=True))
+        os.replace(tmp_file, quizzes_file)
+
+
+class _RequestsNotLoaded(Exception):
+    """Placeholder for RequestTimeout until requests is imported."""
+
+
+# requests (with urllib3, certifi, ...) is only needed by the AI endpoints, so it
+# is imported on the first OpenRouter call. No request can time out before then.
+RequestTimeout = _RequestsNotLoaded
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """Return the shared requests session so OpenRouter connections are reused."""
+    global _http_session, RequestTimeout
+    with _http_session_lock:
+        if _http_session is None:
+            import requests
+            RequestTimeout = requests.exceptions.Timeout
+            session = requests.Session()
+            # One pool per host; enough slots for every concurrent handler thread.
+            session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=32))
+            # Every request goes to OpenRouter, so the static headers live on the session.
+            session.headers.update({
+                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                "Content-Type": "application/json",
+                "HTTP-Referer": "http://localhost:8888",
+                "X-Title": "LeetCode Helper"
+            })
+            _http_session = session
+        return _http_session
+
+
+# Each LLM call can hold its connection for up to a minute, so cap how many
+# run at once and turn requests away once they have queued for too long.
+OPENROUTER_MAX_CONCURRENT = 16
+OPENROUTER_QUEUE_TIMEOUT = 5
+OPENROUTER_RETRY_AFTER = "5"
+
+_openrouter_slots = threading.BoundedSemaphore(OPENROUTER_MAX_CONCURRENT)
+_openrouter_stats_lock = threading.Lock()
+openrouter_stats = {"in_flight": 0, "rejected": 0}
+
 
+class OpenRouterBusy(Exception):
+    """Raised when no OpenRouter slot frees up within OPENROUTER_QUEUE_TIMEOUT."""
 
-# Shared data
-problems_index = load_problems_index()
-problems_cache = {}
-progress = load_progress()
-quizzes = load_quizzes()
+
+@contextlib.contextmanager
+def openrouter_slot():
+    """Hold one of the OPENROUTER_MAX_CONCURRENT upstream call slots."""
+    if not _openrouter_slots.acquire(timeout=OPENROUTER_QUEUE_TIMEOUT):
+        with _openrouter_stats_lock:
+            openrouter_stats["rejected"] += 1
+        raise OpenRouterBusy("Too many AI requests in progress. Please try again shortly.")
+    with _openrouter_stats_lock:
+        openrouter_stats["in_flight"] += 1
+    try:
+        yield
+    finally:
+        with _openrouter_stats_lock:
+            openrouter_stats["in_flight"] -= 1
+        _openrouter_slots.release()
+
+
+def openrouter_post(payload, timeout):
+    """POST a chat completion request to OpenRouter over the shared session, holding a slot."""
+    with openrouter_slot():
+        return get_http_session().post(OPENROUTER_URL, data=encode_json(payload), timeout=timeout)
+
+
+# A repeated solution request for the same problem and code gets the stored
+# answer instead of another multi-second LLM call; the frontend asks for a
+# fresh one ("regenerate") when the user requests it again. Hints persist in
+# progress, and chat answers are not cached so a re-asked question gets a new reply.
+AI_RESPONSE_CACHE_SIZE = 512
+_ai_responses = collections.OrderedDict()
+_ai_responses_lock = threading.Lock()
+
+
+def _ai_response_key(payload):
+    return hashlib.sha256(encode_json(payload)).digest()
+
+
+def get_cached_ai_response(payload):
+    """Return the answer previously generated for this exact OpenRouter payload."""
+    key = _ai_response_key(payload)
+    with _ai_responses_lock:
+        content = _ai_responses.get(key)
+        if content is not None:
+            _ai_responses.move_to_end(key)
+        return content
+
+
+def cache_ai_response(payload, content):
+    """Remember an answer, evicting the least recently used beyond AI_RESPONSE_CACHE_SIZE."""
+    key = _ai_response_key(payload)
+    with _ai_responses_lock:
+        _ai_responses[key] = content
+        _ai_responses.move_to_end(key)
+        if len(_ai_responses) > AI_RESPONSE_CACHE_SIZE:
+            _ai_responses.popitem(last=False)
+
+
+def build_filter_indexes(problems):
+    """Map each difficulty and tag to the (ascending) positions of its problems."""
+    by_difficulty = {}
+    by_tag = {}
+    for position, p in enumerate(problems):
+        by_difficulty.setdefault(p.get("difficulty"), []).append(position)
+        for tag in p.get("topic_tags", []):
+            by_tag.setdefault(tag, []).append(position)
+    return by_difficulty, by_tag
+
+
+def build_search_blobs(problems):
+    """Lowercased "title\ntags" per problem, aligned with problems_index positions."""
+    # The newline keeps a search from matching across the title/tag boundary.
+    return [
+        p.get("title", "").lower() + "\n" + " ".join(p.get("topic_tags", [])).lower()
+        for p in problems
+    ]
+
+
+def build_problem_keys(problems):
+    """Progress key (id or frontend_id as str) per problem, aligned with problems_index."""
+    return [str(p.get("id") or p.get("frontend_id")) for p in problems]
+
+
+def filter_positions(difficulty, tag):
+    """Positions of problems matching the difficulty/tag filters, ascending."""
+    pools = []
+    if difficulty:
+        pools.append(problems_by_difficulty.get(difficulty, []))
+    if tag:
+        pools.append(problems_by_tag.get(tag, []))
+    if not pools:
+        return range(len(problems_index))
+    if len(pools) == 1:
+        return pools[0]
+    pools.sort(key=len)
+    return sorted(set(pools[0]).intersection(*pools[1:]))
+
+
+# (difficulty, search, status, tag) -> [json body, gzipped body or None]
+_problems_responses = {}
+_problems_responses_version = None
+PROBLEMS_RESPONSE_CACHE_SIZE = 64
+
+
+def get_cached_problems_response(key):
+    """Return the cached encoded /api/problems response for key, if still valid."""
+    global _problems_responses_version
+    if _problems_responses_version != progress_version:
+        _problems_responses.clear()
+        _problems_responses_version = progress_version
+    return _problems_responses.get(key)
+
+
+def cache_problems_response(key, entry, version):
+    """Cache an entry built from progress at `version`, unless progress changed since."""
+    if version != progress_version:
+        return
+    # Search strings are free-form, so keep the cache bounded.
+    if len(_problems_responses) >= PROBLEMS_RESPONSE_CACHE_SIZE:
+        _problems_responses.clear()
+    _problems_responses[key] = entry
+
+
+@functools.lru_cache(maxsize=1024)
+def load_problem_tests(starter, example_test_cases, content):
+    """Parse a problem's (test_cases, expected_outputs) once.
+
+    Keyed on the dataset strings themselves: they are the same objects on every
+    run, so their hashes are cached and a reloaded dataset misses naturally.
+    """
+    arg_count = get_arg_count(starter)
+    return tuple(parse_test_cases(example_test_cases, arg_count)), tuple(extract_expected_outputs(content))
+
+
+# Wall-clock limit per test case, from when a worker starts it, before it is
+# reported as Time Limit Exceeded.
+TEST_TIMEOUT = 5
+
+_exec_pool = None
+_exec_pool_lock = threading.Lock()
+
+
+def get_exec_pool():
+    """Return the worker pool that runs user code out of the server process."""
+    global _exec_pool
+    with _exec_pool_lock:
+        if _exec_pool is None:
+            _exec_pool = WorkerPool(max_workers=min(4, os.cpu_count() or 1))
+        return _exec_pool
+
+
+# The roadmap has four 15-day phases.
+ROADMAP_PHASE_DAYS = 15
+ROADMAP_PHASES = 4
+ROADMAP_DAYS = ROADMAP_PHASE_DAYS * ROADMAP_PHASES
+HINT_LEVELS = 3
+
+
+def _as_int(value, lo=None, hi=None):
+    """Read an integer field from request JSON; None if missing, malformed or out of range."""
+    # JSON numbers are usually ints already, so only strings and floats go
+    # through int() and its exception path. bool is an int subclass but not a number here.
+    if type(value) is not int:
+        if isinstance(value, bool) or not isinstance(value, (str, float)):
+            return None
+        try:
+            number = int(value)
+        except (ValueError, OverflowError):
+            return None
+        if isinstance(value, float) and number != value:
+            return None
+        value = number
+    if (lo is not None and value < lo) or (hi is not None and value > hi):
+        return None
+    return value
+
+
+def phase_for_day(day):
+    """Roadmap phase (1-4) that contains the given day."""
+    return min(ROADMAP_PHASES, max(1, (day - 1) // ROADMAP_PHASE_DAYS + 1))
+
+
+def complete_roadmap_day(roadmap, day):
+    """Mark a day done, advancing the current day and unlocking the next phase when reached.
+
+    Returns False if the day was already completed and nothing changed.
+    """
+    completed = roadmap["completedDays"]
+    changed = day not in completed
+    completed.add(day)
+
+    # Auto-advance current day
+    if roadmap["currentDay"] == day:
+        changed = True
+        roadmap["currentDay"] = day + 1
+
+        # Check if phase is complete and unlock next phase
+        phase = phase_for_day(roadmap["currentDay"])
+        if phase > roadmap["currentPhase"]:
+            roadmap["currentPhase"] = phase
+            if phase not in roadmap["unlockedPhases"]:
+                roadmap["unlockedPhases"].append(phase)
+    return changed
+
+
+# Static files above this size are streamed with sendfile instead of cached.
+STATIC_CACHE_MAX_BYTES = 1024 * 1024
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+
+
+def guess_content_type(filepath):
+    content_type, _ = mimetypes.guess_type(str(filepath))
+    return content_type or "application/octet-stream"
+
+
+@functools.lru_cache(maxsize=128)
+def load_static(path, mtime_ns):
+    """Read a static file once per mtime; returns (body, gzipped body or None, content type)."""
+    content_type = guess_content_type(path)
+    body = Path(path).read_bytes()
+    gzipped = None
+    if content_type.startswith(COMPRESSIBLE_TYPES):
+        gzipped = gzip.compress(body, compresslevel=6)
+        if len(gzipped) >= len(body):
+            gzipped = None
+    return body, gzipped, content_type
+
+
+# Shared data, filled in by load_shared_data(). Test workers re-import this
+# module under spawn and never call it, so they skip reading the data files.
+problems_index = []
+problems_by_difficulty, problems_by_tag = {}, {}
+problem_search_blobs = []
+problem_keys = []
+progress = None
+quizzes = {}
+
+
+def load_shared_data():
+    """Read the problem index, progress and quizzes the handlers serve from."""
+    global problems_index, problems_by_difficulty, problems_by_tag, problem_search_blobs, problem_keys, progress, quizzes
+    problems_index = load_problems_index()
+    problems_by_difficulty, problems_by_tag = build_filter_indexes(problems_index)
+    problem_search_blobs = build_search_blobs(problems_index)
+    problem_keys = build_problem_keys(problems_index)
+    progress = load_progress()
+    quizzes = load_quizzes()
+
+
+# AI prompt templates; filled with str.format, so literal braces must be doubled.
+SOLUTION_PROMPT = """You are a helpful Python coding tutor helping with LeetCode-style problems. 
+{context}
+
+Task:
+1. Start with a clean, basic solution that's easy to understand.
+2. Keep it simple first - optimize later if user asks.
+3. Briefly explain the core idea (2-3 sentences max).
+4. Provide Python 3 code with minimal comments - let the code speak for itself.
+5. State time and space complexity.
+6. Show a quick dry run with 1-2 examples if the algorithm isn't obvious.
+
+Guidelines:
+- Prioritize readability and clarity over clever tricks.
+- Use simple loops and data structures first.
+- Add comments only for non-obvious parts.
+- Assume the user wants to learn from a working solution, not get the most optimized answer immediately.
+- If tests fail, focus on fixing the bug, not optimization.
+- Consider common edge cases: empty inputs, single elements, duplicates, boundary values.
+- Use idiomatic Python when appropriate (list comprehensions, enumerate, etc.).
+
+Response Format:
+- Use clean Markdown.
+- Keep explanations short and practical.
+- Show a working example (dry run) if helpful.
+"""
+
+HINT_PROMPT = """You are a helpful Python tutor. Provide progressive code hints to guide the user to a working solution.
+
+{context}
+
+Generate Hint Level {hint_level}:
+{hint_guidance}
+
+Rules:
+1. Output only Python code, no explanations or markdown code fences.
+2. Use TODO comments or simple comments to show what's missing - don't use ??? which breaks syntax.
+3. Keep code syntactically valid - use pass or return "" for missing parts.
+4. Add comments sparingly - only for key insights, not everywhere.
+5. Make the hint build on previous hints if they exist.
+6. Consider edge cases in your hints: empty inputs, single elements, duplicates, boundary values.
+7. If user code exists and fails tests, help them fix the specific issue rather than starting over.
+
+Example format for TODO:
+    # TODO: implement core logic here
+    or
+    # HINT: check if value already exists
+
+Output only the Python code (no ```python``` wrapper)."""
+
+CHAT_PROMPT = """You are a helpful Python tutor helping a user with a coding problem.
+
+{context}
+
+User Question: {question}
+
+Task:
+- Answer the question directly and helpfully.
+- Adjust your response style based on what they're asking:
+  * "Why does this fail?" → Analyze the bug, show what's wrong, suggest fix
+  * "Help me start" → Suggest approach, show skeleton, explain first steps
+  * "Explain this code" → Walk through line by line, show what each part does
+  * "Can you optimize this?" → Suggest improvements, show before/after comparison
+  * General question → Give clear explanation, keep it concise but complete
+- If showing code, keep it short and relevant (5-10 lines max unless demonstrating full solution).
+- If the algorithm is complex, show a quick dry run with 1-2 examples.
+- Use Markdown for formatting.
+
+Guidelines:
+- Be direct and practical, not mysterious or overly "nudgey".
+- If the user's code is failing, identify the specific issue clearly.
+- If all tests pass, suggest optimizations or edge cases to consider.
+- If no tests pass, start with basics - don't optimize broken code.
+- Adjust depth based on conversation length: shorter answers early, more detailed if they keep asking.
+- When discussing algorithms, mention edge cases: empty, single element, duplicates, boundaries.
+- If test guidance mentions "no tests pass", focus on fundamental logic errors.
+- If test guidance mentions "some tests fail", analyze the specific failing cases.
+- If test guidance mentions "all tests pass", you can suggest alternatives or optimizations.
+
+Response Format:
+- Use clean Markdown.
+"""
+
+# What each hint level reveals, substituted into HINT_PROMPT.
+HINT_GUIDANCE = {
+    1: "Show a basic structure: imports, class definition, method signature, and main data structures. Leave the core logic as a simple TODO comment.",
+    2: "Show the main loop or recursion structure. Fill in key data structures. Leave only the tricky comparison or calculation as TODO.",
+    3: "Show a nearly complete solution. Leave only 1-2 lines blank (the key insight or edge case handling). Add brief comments where helpful, not everywhere."
+}
 
 
 class LeetCodeHandler(http.server.BaseHTTPRequestHandler):
     """Custom HTTP handler for LeetCode Helper."""
 
-    def send_json(self, data, status=200):
+    # Keep connections open between the frontend's API calls; every response
+    # therefore carries a Content-Length (or closes the connection).
+    protocol_version = "HTTP/1.1"
+    # Buffer the socket writer so headers and small bodies go out in one send;
+    # handle_one_request flushes it after every response.
+    wbufsize = 64 * 1024
+    # Drop idle keep-alive connections instead of pinning their threads.
+    timeout = 120
+    # Responses are written whole, so Nagle would only delay them.
+    disable_nagle_algorithm = True
+
+    def send_json(self, data, status=200, headers=None):
         """Send JSON response."""
+        self.send_json_body(encode_json(data), status, headers=headers)
+
+    def send_json_body(self, body, status=200, content_encoding=None, headers=None):
+        """Send an already-encoded JSON body."""
         self.send_response(status)
         self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if content_encoding:
+            self.send_header("Content-Encoding", content_encoding)
+            self.send_header("Vary", "Accept-Encoding")
+        if headers:
+            for name, value in headers.items():
+                self.send_header(name, value)
+        if self.close_connection:
+            self.send_header("Connection", "close")
         self.send_header("Access-Control-Allow-Origin", "*")
         self.end_headers()
-        self.wfile.write(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+        self.wfile.write(body)
+
+    def read_json_body(self):
+        """Read and parse a JSON object body; on failure send the error and return None."""
+        try:
+            content_length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            content_length = -1
+        if content_length == 0:
+            self.send_json({"error": "No content"}, 400)
+            return None
+        if content_length < 0 or content_length > MAX_REQUEST_BODY:
+            # The body is left unread, so this connection can't carry another request
+            self.close_connection = True
+            if content_length < 0:
+                self.send_json({"error": "Invalid Content-Length"}, 400)
+            else:
+                self.send_json({"error": "Request body too large"}, 413)
+            return None
+
+        post_data = self.rfile.read(content_length)
+        try:
+            data = decode_json(post_data)
+        except json.JSONDecodeError:
+            self.send_json({"error": "Invalid JSON"}, 400)
+            return None
+        if not isinstance(data, dict):
+            self.send_json({"error": "Expected a JSON object"}, 400)
+            return None
+        return data
+
+    def accepts_gzip(self):
+        return "gzip" in self.headers.get("Accept-Encoding", "")
 
     def send_file(self, filepath):
         """Send a static file."""
-        if not filepath.exists():
+        if not filepath.is_file():
             self.send_error(404, "File not found")
             return
 
-        # Determine content type
-        content_type, _ = mimetypes.guess_type(str(filepath))
-        if content_type is None:
-            content_type = "application/octet-stream"
+        stat = filepath.stat()
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+        if stat.st_size > STATIC_CACHE_MAX_BYTES:
+            self.send_large_file(filepath, stat.st_size, etag + '"')
+            return
+
+        body, gzipped, content_type = load_static(str(filepath), stat.st_mtime_ns)
+        use_gzip = gzipped is not None and self.accepts_gzip()
+        if use_gzip:
+            body = gzipped
+        # The gzip and identity bodies are different representations
+        etag += '-gz"' if use_gzip else '"'
+        if self.etag_matches(etag):
+            self.send_not_modified(etag, vary=gzipped is not None)
+            return
 
         self.send_response(200)
         self.send_header("Content-Type", content_type)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Content-Length", str(len(body)))
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        if gzipped is not None:
+            self.send_header("Vary", "Accept-Encoding")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def etag_matches(self, etag):
+        """Whether the request's If-None-Match already names this version."""
+        header = self.headers.get("If-None-Match")
+        if not header:
+            return False
+        tags = {tag.strip() for tag in header.split(",")}
+        return "*" in tags or etag in tags or "W/" + etag in tags
+
+    def send_not_modified(self, etag, vary=False):
+        """Tell the browser its cached copy is current; 304 responses have no body."""
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        if vary:
+            self.send_header("Vary", "Accept-Encoding")
         self.end_headers()
 
+    def send_large_file(self, filepath, size, etag):
+        """Stream a file straight from the page cache to the socket."""
+        if self.etag_matches(etag):
+            self.send_not_modified(etag)
+            return
         with open(filepath, "rb") as f:
-            self.wfile.write(f.read())
+            self.send_response(200)
+            self.send_header("Content-Type", guess_content_type(filepath))
+            self.send_header("Content-Length", str(size))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.flush()
+            self.connection.sendfile(f, count=size)
 
     def do_OPTIONS(self):
         """Handle OPTIONS requests for CORS."""
@@ -132,6 +797,7 @@ class LeetCodeHandler(http.server.BaseHTTPRequestHandler):
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
         self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.send_header("Content-Length", "0")
         self.end_headers()
 
     def do_GET(self):
@@ -150,6 +816,10 @@ class LeetCodeHandler(http.server.BaseHTTPRequestHandler):
             self.get_roadmap_progress()
         elif parsed.path == "/api/quiz":
             self.handle_quiz()
+        elif parsed.path == "/api/ai/status":
+            with _openrouter_stats_lock:
+                stats = dict(openrouter_stats)
+            self.send_json({**stats, "limit": OPENROUTER_MAX_CONCURRENT})
         elif parsed.path == "/" or parsed.path == "/index.html":
             self.send_file(STATIC_DIR / "index.html")
         elif parsed.path.startswith("/static/"):
@@ -193,68 +863,61 @@ class LeetCodeHandler(http.server.BaseHTTPRequestHandler):
         status_filter = params.get("status", [None])[0]  # "solved" or "unsolved"
         tag = params.get("tag", [None])[0]
 
-        problems = problems_index.copy()
-        solved_dict = progress.get("solved", {})
-
-        # Apply filters
+        cache_key = (difficulty, search, status_filter, tag)
+        entry = get_cached_problems_response(cache_key)
+        if entry is None:
+            version = progress_version
+            entry = [encode_json(self.filter_problems(difficulty, search, status_filter, tag)), None]
+            cache_problems_response(cache_key, entry, version)
+
+        if self.accepts_gzip():
+            if entry[1] is None:
+                entry[1] = gzip.compress(entry[0], compresslevel=1)
+            self.send_json_body(entry[1], content_encoding="gzip")
+        else:
+            self.send_json_body(entry[0])
+
+    def filter_problems(self, difficulty, search, status_filter, tag):
+        """Apply the /api/problems filters and attach solved status."""
+        # Difficulty and tag filters come from the precomputed indexes
+        positions = filter_positions(difficulty, tag)
+        search_lower = search.lower() if search else None
+        if search_lower and "\n" in search_lower:
+            # Could only match across the blob separator, never a real title or tag
+            return []
+        solved_dict = progress["solved"]
+
+        # Remaining filters, cheapest first: a dict lookup, then the substring scan
         filtered = []
-        for p in problems:
-            # Difficulty filter
-            if difficulty and p.get("difficulty") != difficulty:
-                continue
-
-            # Status filter
-            pid = str(p.get("id") or p.get("frontend_id"))
-            is_solved = pid in solved_dict
+        for i in positions:
+            is_solved = problem_keys[i] in solved_dict
             if status_filter == "solved" and not is_solved:
                 continue
             if status_filter == "unsolved" and is_solved:
                 continue
-
-            # Tag filter
-            if tag and tag not in p.get("topic_tags", []):
+            if search_lower and search_lower not in problem_search_blobs[i]:
                 continue
 
-            # Search filter
-            if search:
-                search_lower = search.lower()
-                title = p.get("title", "").lower()
-                tags = " ".join(p.get("topic_tags", [])).lower()
-                if search_lower not in title and search_lower not in tags:
-                    continue
-
-            # Add solved status
-            p_with_status = p.copy()
-            p_with_status["solved"] = is_solved
-            filtered.append(p_with_status)
+            # Add solved status; only surviving rows get a new dict
+            filtered.append({**problems_index[i], "solved": is_solved})
 
-        self.send_json(filtered)
+        return filtered
 
     def get_problem(self, problem_id):
         """Get full problem details."""
-        problem = load_full_problem(problem_id, problems_cache)
+        problem = load_full_problem(problem_id)
         if not problem:
             self.send_json({"error": "Problem not found"}, 404)
             return
 
-        # Add solved status
+        # Add solved status without mutating the shared index entry
         pid = str(problem.get("id") or problem.get("frontend_id"))
-        problem["solved"] = pid in progress.get("solved", {})
-
-        self.send_json(problem)
+        self.send_json({**problem, "solved": pid in progress["solved"]})
 
     def run_code(self):
         """Execute Python code against test cases."""
-        content_length = int(self.headers.get("Content-Length", 0))
-        if content_length == 0:
-            self.send_json({"error": "No content"}, 400)
-            return
-
-        post_data = self.rfile.read(content_length)
-        try:
-            data = json.loads(post_data.decode("utf-8"))
-        except json.JSONDecodeError:
-            self.send_json({"error": "Invalid JSON"}, 400)
+        data = self.read_json_body()
+        if data is None:
             return
 
         code = data.get("code", "")
@@ -267,22 +930,40 @@ class LeetCodeHandler(http.server.BaseHTTPRequestHandler):
             return
 
         # Fetch problem details to get proper test cases and argument count
-        problem = load_full_problem(problem_id, problems_cache)
+        problem = load_full_problem(problem_id)
+        starter = get_python3_starter(problem) if problem else ""
         if problem:
-            starter = get_python3_starter(problem)
-            arg_count = get_arg_count(starter)
-            test_cases = parse_test_cases(problem.get("example_test_cases", ""), arg_count)
-            expected_outputs = extract_expected_outputs(problem.get("content", ""))
+            test_cases, expected_outputs = load_problem_tests(
+                starter,
+                problem.get("example_test_cases", ""),
+                problem.get("content", ""),
+            )
         else:
             # Fallback to provided data if problem not found in cache
             test_cases = data.get("test_cases", [])
             expected_outputs = data.get("expected_outputs", [])
 
+        jobs = [
+            (code, test_input, class_name, function_name, expected_outputs[i] if i < len(expected_outputs) else None, starter)
+            for i, test_input in enumerate(test_cases)
+        ]
+        # Tests run one after another, so a run holds at most one worker and
+        # concurrent runs share the pool fairly.
+        pool = get_exec_pool()
         results = []
-        for i, test_input in enumerate(test_cases):
-            expected = expected_outputs[i] if i < len(expected_outputs) else None
-            result = self.execute_test(code, test_input, i, class_name, function_name, expected)
-            results.append(result)
+        timed_out = False
+        for job in jobs:
+            test_input = job[1]
+            if timed_out:
+                results.append({"passed": False, "error": "Not run: an earlier test exceeded the time limit", "test_input": str(test_input)})
+                continue
+            try:
+                results.append(pool.run(job, TEST_TIMEOUT))
+            except TimeoutError:
+                timed_out = True
+                results.append({"passed": False, "error": f"Time Limit Exceeded ({TEST_TIMEOUT}s)", "test_input": str(test_input)})
+            except WorkerDied:
+                results.append({"passed": False, "error": "Execution was interrupted, please run again", "test_input": str(test_input)})
 
         passed = sum(1 for r in results if r["passed"])
         self.send_json({
@@ -292,54 +973,6 @@ class LeetCodeHandler(http.server.BaseHTTPRequestHandler):
         })
 
 
-    def execute_test(self, code, test_input, index, class_name, function_name, expected_output=None):
-        """Execute a single test case using the new runner."""
-        try:
-            # The test_input from the web might be a list of inputs already
-            actual = execute_code(code, test_input, class_name, function_name)
-            
-            # Compare output with expected
-            if expected_output:
-                try:
-                    # Clean the expected output string (it often comes from problem description)
-                    # Decode HTML entities (e.g., &quot; -> ") and parse it
-                    decoded_output = html.unescape(expected_output.strip())
-                    expected_val = ast.literal_eval(decoded_output)
-                except:
-                    # Fallback for booleans
-                    if expected_output.strip().lower() == "true":
-                        expected_val = True
-                    elif expected_output.strip().lower() == "false":
-                        expected_val = False
-                    elif expected_output.strip().lower() == "null":
-                        expected_val = None
-                    else:
-                        expected_val = expected_output
-                
-                passed = compare_results(actual, expected_val)
-                
-                return {
-                    "passed": passed,
-                    "input": str(test_input),
-                    "actual": str(actual),
-                    "expected": str(expected_val),
-                }
-            else:
-                return {
-                    "passed": True,
-                    "input": str(test_input),
-                    "actual": str(actual),
-                }
-
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            return {
-                "passed": False,
-                "error": str(e),
-                "test_input": str(test_input),
-            }
-
     def _build_ai_messages(self, conversation_history, problem_title, problem_description, starter_code, current_code, test_results, test_cases, mode="chat", hint_level=1, question=None):
         """Build unified AI messages for all interactions.
         
@@ -409,60 +1042,13 @@ class LeetCodeHandler(http.server.BaseHTTPRequestHandler):
         
         # Build prompt based on mode
         if mode == "solution":
-            prompt = f"""You are a helpful Python coding tutor helping with LeetCode-style problems. 
-{context_str}
-
-Task:
-1. Start with a clean, basic solution that's easy to understand.
-2. Keep it simple first - optimize later if user asks.
-3. Briefly explain the core idea (2-3 sentences max).
-4. Provide Python 3 code with minimal comments - let the code speak for itself.
-5. State time and space complexity.
-6. Show a quick dry run with 1-2 examples if the algorithm isn't obvious.
-
-Guidelines:
-- Prioritize readability and clarity over clever tricks.
-- Use simple loops and data structures first.
-- Add comments only for non-obvious parts.
-- Assume the user wants to learn from a working solution, not get the most optimized answer immediately.
-- If tests fail, focus on fixing the bug, not optimization.
-- Consider common edge cases: empty inputs, single elements, duplicates, boundary values.
-- Use idiomatic Python when appropriate (list comprehensions, enumerate, etc.).
-
-Response Format:
-- Use clean Markdown.
-- Keep explanations short and practical.
-- Show a working example (dry run) if helpful.
-"""
+            prompt = SOLUTION_PROMPT.format(context=context_str)
         elif mode == "hint":
-            hint_guidance_map = {
-                1: "Show a basic structure: imports, class definition, method signature, and main data structures. Leave the core logic as a simple TODO comment.",
-                2: "Show the main loop or recursion structure. Fill in key data structures. Leave only the tricky comparison or calculation as TODO.",
-                3: "Show a nearly complete solution. Leave only 1-2 lines blank (the key insight or edge case handling). Add brief comments where helpful, not everywhere."
-            }
-            
-            prompt = f"""You are a helpful Python tutor. Provide progressive code hints to guide the user to a working solution.
-
-{context_str}
-
-Generate Hint Level {hint_level}:
-{hint_guidance_map.get(hint_level, "")}
-
-Rules:
-1. Output only Python code, no explanations or markdown code fences.
-2. Use TODO comments or simple comments to show what's missing - don't use ??? which breaks syntax.
-3. Keep code syntactically valid - use pass or return "" for missing parts.
-4. Add comments sparingly - only for key insights, not everywhere.
-5. Make the hint build on previous hints if they exist.
-6. Consider edge cases in your hints: empty inputs, single elements, duplicates, boundary values.
-7. If user code exists and fails tests, help them fix the specific issue rather than starting over.
-
-Example format for TODO:
-    # TODO: implement core logic here
-    or
-    # HINT: check if value already exists
-
-Output only the Python code (no ```python``` wrapper)."""
+            prompt = HINT_PROMPT.format(
+                context=context_str,
+                hint_level=hint_level,
+                hint_guidance=HINT_GUIDANCE.get(hint_level, ""),
+            )
         else:  # chat mode
             if not question and conversation_history:
                 question = conversation_history[-1].get("text", "")
@@ -470,53 +1056,14 @@ Output only the Python code (no ```python``` wrapper)."""
             if not question:
                 raise ValueError("Question required in chat mode")
             
-            prompt = f"""You are a helpful Python tutor helping a user with a coding problem.
-
-{context_str}
-
-User Question: {question}
-
-Task:
-- Answer the question directly and helpfully.
-- Adjust your response style based on what they're asking:
-  * "Why does this fail?" → Analyze the bug, show what's wrong, suggest fix
-  * "Help me start" → Suggest approach, show skeleton, explain first steps
-  * "Explain this code" → Walk through line by line, show what each part does
-  * "Can you optimize this?" → Suggest improvements, show before/after comparison
-  * General question → Give clear explanation, keep it concise but complete
-- If showing code, keep it short and relevant (5-10 lines max unless demonstrating full solution).
-- If the algorithm is complex, show a quick dry run with 1-2 examples.
-- Use Markdown for formatting.
-
-Guidelines:
-- Be direct and practical, not mysterious or overly "nudgey".
-- If the user's code is failing, identify the specific issue clearly.
-- If all tests pass, suggest optimizations or edge cases to consider.
-- If no tests pass, start with basics - don't optimize broken code.
-- Adjust depth based on conversation length: shorter answers early, more detailed if they keep asking.
-- When discussing algorithms, mention edge cases: empty, single element, duplicates, boundaries.
-- If test guidance mentions "no tests pass", focus on fundamental logic errors.
-- If test guidance mentions "some tests fail", analyze the specific failing cases.
-- If test guidance mentions "all tests pass", you can suggest alternatives or optimizations.
-
-Response Format:
-- Use clean Markdown.
-"""
+            prompt = CHAT_PROMPT.format(context=context_str, question=question)
         
         return [{"role": "user", "content": prompt}]
 
     def get_ai_solution(self):
         """Generate AI solution - unified with chat system."""
-        content_length = int(self.headers.get("Content-Length", 0))
-        if content_length == 0:
-            self.send_json({"error": "No content"}, 400)
-            return
-
-        post_data = self.rfile.read(content_length)
-        try:
-            data = json.loads(post_data.decode("utf-8"))
-        except json.JSONDecodeError:
-            self.send_json({"error": "Invalid JSON"}, 400)
+        data = self.read_json_body()
+        if data is None:
             return
 
         problem_title = data.get("problem_title", "")
@@ -551,26 +1098,23 @@ Response Format:
         # Log what we're sending
         print(f"[AI UNIFIED] Mode=solution, Problem={problem_title}")
 
+        payload = {
+            "model": AURORA_MODEL,
+            "messages": messages,
+            "max_tokens": 3500,
+        }
+        if not data.get("regenerate"):
+            cached = get_cached_ai_response(payload)
+            if cached is not None:
+                self.send_json({"solution": cached})
+                return
+
         try:
             if not OPENROUTER_API_KEY:
                 self.send_json({"error": "OpenRouter API key not configured"}, 500)
                 return
 
-            response = requests.post(
-                url="https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                    "Content-Type": "application/json",
-                    "HTTP-Referer": "http://localhost:8888",
-                    "X-Title": "LeetCode Helper"
-                },
-                json={
-                    "model": AURORA_MODEL,
-                    "messages": messages,
-                    "max_tokens": 3500,
-                },
-                timeout=60
-            )
+            response = openrouter_post(payload, timeout=60)
 
             if response.status_code != 200:
                 self.send_json({
@@ -579,8 +1123,9 @@ Response Format:
                 }, 500)
                 return
 
-            result = response.json()
-            content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+            result = decode_json(response.content)
+            choice = result.get("choices", [{}])[0]
+            content = choice.get("message", {}).get("content", "")
             
             # Log solution for debugging
             print(f"[AI SOLUTION] Content type: {type(content).__name__}, Content preview: {content[:200]}")
@@ -589,25 +1134,23 @@ Response Format:
                 self.send_json({"error": "Empty response from AI"}, 500)
                 return
 
-            self.send_json({"solution": content.strip()})
+            content = content.strip()
+            # A reply cut off by max_tokens or a filter must not be served again
+            if choice.get("finish_reason") == "stop":
+                cache_ai_response(payload, content)
+            self.send_json({"solution": content})
 
-        except requests.exceptions.Timeout:
+        except OpenRouterBusy as e:
+            self.send_json({"error": str(e)}, 503, headers={"Retry-After": OPENROUTER_RETRY_AFTER})
+        except RequestTimeout:
             self.send_json({"error": "Request timed out. Please try again."}, 504)
         except Exception as e:
             self.send_json({"error": str(e)}, 500)
 
     def get_ai_explanation(self):
         """Explain a piece of code or answer a syntax question using AI - unified with chat system."""
-        content_length = int(self.headers.get("Content-Length", 0))
-        if content_length == 0:
-            self.send_json({"error": "No content"}, 400)
-            return
-
-        post_data = self.rfile.read(content_length)
-        try:
-            data = json.loads(post_data.decode("utf-8"))
-        except json.JSONDecodeError:
-            self.send_json({"error": "Invalid JSON"}, 400)
+        data = self.read_json_body()
+        if data is None:
             return
 
         question = data.get("question", "")
@@ -637,32 +1180,24 @@ Response Format:
         # Log what we're sending
         print(f"[AI EXPLAIN] Mode=chat")
 
+        payload = {
+            "model": AURORA_MODEL,
+            "messages": messages,
+            "max_tokens": 1500,
+        }
+
         try:
             if not OPENROUTER_API_KEY:
                 self.send_json({"error": "OpenRouter API key not configured"}, 500)
                 return
 
-            response = requests.post(
-                url="https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                    "Content-Type": "application/json",
-                    "HTTP-Referer": "http://localhost:8888",
-                    "X-Title": "LeetCode Helper"
-                },
-                json={
-                    "model": AURORA_MODEL,
-                    "messages": messages,
-                    "max_tokens": 1500,
-                },
-                timeout=45
-            )
+            response = openrouter_post(payload, timeout=45)
 
             if response.status_code != 200:
                 self.send_json({"error": f"AI request failed: {response.status_code}"}, 500)
                 return
 
-            result = response.json()
+            result = decode_json(response.content)
             answer = result.get("choices", [{}])[0].get("message", {}).get("content", "")
             
             # Log the answer type and content for debugging
@@ -674,134 +1209,22 @@ Response Format:
 
             self.send_json({"answer": answer.strip()})
 
-        except requests.exceptions.Timeout:
+        except OpenRouterBusy as e:
+            self.send_json({"error": str(e)}, 503, headers={"Retry-After": OPENROUTER_RETRY_AFTER})
+        except RequestTimeout:
             self.send_json({"error": "Request timed out. Please try again."}, 504)
         except Exception as e:
             self.send_json({"error": str(e)}, 500)
 
-    def get_ai_explanation_stream(self):
-        """Stream AI responses - unified with chat system."""
-        content_length = int(self.headers.get("Content-Length", 0))
-        if content_length == 0:
-            self.send_json({"error": "No content"}, 400)
-            return
-
-        post_data = self.rfile.read(content_length)
-        try:
-            data = json.loads(post_data.decode("utf-8"))
-        except json.JSONDecodeError:
-            self.send_json({"error": "Invalid JSON"}, 400)
-            return
-
-        question = data.get("question", "")
-        code_snippet = data.get("code_snippet", "")
-        problem_title = data.get("problem_title", "")
-        current_code = data.get("current_code", "")
-        conversation_history = data.get("conversation_history", [])
-        test_results = data.get("test_results", None)
-
-        if not question:
-            self.send_json({"error": "Question required"}, 400)
-            return
-
-        # Build unified messages using the new system
-        messages = self._build_ai_messages(
-            conversation_history=conversation_history,
-            problem_title=problem_title,
-            problem_description="",  # Chat doesn't need full problem description
-            starter_code="",
-            current_code=current_code,
-            test_results=test_results,
-            test_cases=[],
-            mode="chat",
-            question=question
-        )
-
-        # Log what we're sending
-        print(f"[AI EXPLAIN STREAM] Mode=chat")
-
-        try:
-            if not OPENROUTER_API_KEY:
-                self.send_json({"error": "OpenRouter API key not configured"}, 500)
-                return
-
-            # Set up SSE streaming
-            self.send_response(200)
-            self.send_header("Content-Type", "text/event-stream")
-            self.send_header("Cache-Control", "no-cache")
-            self.send_header("Connection", "keep-alive")
-            self.end_headers()
-
-            response = requests.post(
-                url="https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                    "Content-Type": "application/json",
-                    "HTTP-Referer": "http://localhost:8888",
-                    "X-Title": "LeetCode Helper"
-                },
-                json={
-                    "model": AURORA_MODEL,
-                    "messages": messages,
-                    "max_tokens": 1500,
-                    "stream": True,
-                },
-                timeout=60,
-                stream=True
-            )
-
-            if response.status_code != 200:
-                self.wfile.write(b"data: " + json.dumps({"error": f"AI request failed: {response.status_code}"}).encode() + b"\n\n")
-                return
-
-            # Stream the response
-            for line in response.iter_lines():
-                if line:
-                    line = line.decode('utf-8')
-                    if line.startswith('data: '):
-                        data_str = line[6:]
-                        if data_str == '[DONE]':
-                            break
-                        try:
-                            data = json.loads(data_str)
-                            if 'choices' in data and len(data['choices']) > 0:
-                                delta = data['choices'][0].get('delta', {})
-                                content = delta.get('content', '')
-                                # Only send if content is a non-empty string
-                                if content and isinstance(content, str) and content.strip():
-                                    print(f"[STREAM] Sending content: {content[:100]}... (type: {type(content).__name__})")
-                                    self.wfile.write(b"data: " + json.dumps({"content": content}).encode() + b"\n\n")
-                                    self.wfile.flush()
-                        except json.JSONDecodeError:
-                            continue
-
-            # Send done signal
-            self.wfile.write(b"data: [DONE]\n\n")
-
-        except requests.exceptions.Timeout:
-            self.wfile.write(b"data: " + json.dumps({"error": "Request timed out. Please try again."}).encode() + b"\n\n")
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            self.wfile.write(b"data: " + json.dumps({"error": str(e)}).encode() + b"\n\n")
-
     def get_hint(self):
         """Generate progressive hint - unified with chat system."""
         try:
-            content_length = int(self.headers.get("Content-Length", 0))
-            if content_length == 0:
-                self.send_json({"error": "No content"}, 400)
-                return
-
-            post_data = self.rfile.read(content_length)
-            try:
-                data = json.loads(post_data.decode("utf-8"))
-            except json.JSONDecodeError as e:
-                self.send_json({"error": f"Invalid JSON: {str(e)}"}, 400)
+            data = self.read_json_body()
+            if data is None:
                 return
 
             problem_id = data.get("problem_id")
-            hint_level = int(data.get("hint_level", 1))
+            hint_level = _as_int(data.get("hint_level", 1), 1, HINT_LEVELS)
             regenerate = data.get("regenerate", False)
             problem_title = data.get("problem_title", "")
             problem_description = data.get("problem_description", "")
@@ -811,16 +1234,18 @@ Response Format:
             if not problem_id:
                 self.send_json({"error": "Problem ID required"}, 400)
                 return
+            if hint_level is None:
+                self.send_json({"error": "Invalid hint level"}, 400)
+                return
 
             global progress
-            progress.setdefault("hints", {})
             
             problem_id = str(problem_id)
             hint_data = progress["hints"].get(problem_id, {"hints": [], "revealed": 0})
             
             needs_generation = regenerate or not hint_data["hints"] or len(hint_data["hints"]) < hint_level
             
-            if needs_generation and hint_level <= 3:
+            if needs_generation:
                 # Build unified messages using the new system
                 messages = self._build_ai_messages(
                     conversation_history=[],  # Hints don't need conversation history
@@ -841,20 +1266,13 @@ Response Format:
                     self.send_json({"error": "OpenRouter API key not configured"}, 500)
                     return
 
-                response = requests.post(
-                    url="https://openrouter.ai/api/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                        "Content-Type": "application/json",
-                        "HTTP-Referer": "http://localhost:8888",
-                        "X-Title": "LeetCode Helper"
-                    },
-                    json={
+                response = openrouter_post(
+                    {
                         "model": AURORA_MODEL,
                         "messages": messages,
                         "max_tokens": 1000,
                     },
-                    timeout=60
+                    timeout=60,
                 )
 
                 if response.status_code != 200:
@@ -864,7 +1282,7 @@ Response Format:
                     }, 500)
                     return
 
-                result = response.json()
+                result = decode_json(response.content)
                 content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
                 
                 if not content:
@@ -875,17 +1293,18 @@ Response Format:
                 content = content.strip()
                 print(f"[HINT] Hint level {hint_level} content type: {type(content).__name__}, content preview: {content[:150]}")
                 
-                while len(hint_data["hints"]) < hint_level:
-                    hint_data["hints"].append("")
-                hint_data["hints"][hint_level - 1] = content
-                
-                progress["hints"][problem_id] = hint_data
+                with progress_lock:
+                    while len(hint_data["hints"]) < hint_level:
+                        hint_data["hints"].append("")
+                    hint_data["hints"][hint_level - 1] = content
+                    progress["hints"][problem_id] = hint_data
+                    record_progress_change(("hints", problem_id), hint_data)
                 save_progress(progress)
 
                 self.send_json({
                     "hint": content,
                     "hint_level": hint_level,
-                    "total_hints": 3,
+                    "total_hints": HINT_LEVELS,
                     "is_new": True
                 })
 
@@ -894,82 +1313,28 @@ Response Format:
                     self.send_json({
                         "hint": hint_data["hints"][hint_level - 1],
                         "hint_level": hint_level,
-                        "total_hints": 3,
+                        "total_hints": HINT_LEVELS,
                         "is_new": False
                     })
                 else:
                     self.send_json({"error": "Hint not available"}, 404)
 
-        except requests.exceptions.Timeout:
+        except OpenRouterBusy as e:
+            self.send_json({"error": str(e)}, 503, headers={"Retry-After": OPENROUTER_RETRY_AFTER})
+        except RequestTimeout:
             self.send_json({"error": "Request timed out. Please try again."}, 504)
         except Exception as e:
-            import traceback
-            traceback.print_exc()
+            # Reply first; formatting the traceback can wait
             self.send_json({"error": f"Server error: {str(e)}"}, 500)
-
-    def build_hint_prompt(self, problem_title, problem_description, starter_code, hint_level, previous_hints, current_code):
-        """Build a prompt to generate code hints that can be inserted into editor."""
-        
-        hint_guidance = {
-            1: "Show the basic structure: imports, class definition, method signature, and main data structures. Leave the core logic as a simple TODO comment.",
-            2: "Show the main loop or recursion structure. Fill in key data structures. Leave only the tricky comparison or calculation as TODO.",
-            3: "Show a nearly complete solution. Leave only 1-2 lines blank (the key insight or edge case handling). Add brief comments where helpful, not everywhere."
-        }
-        
-        user_code_context = ""
-        if current_code and current_code.strip() != starter_code.strip():
-            user_code_context = f"\n\nUser's current attempt:\n```python\n{current_code}\n```\nNotice where they might be stuck and help from there."
-        
-        previous_hints_text = ""
-        if previous_hints:
-            previous_hints_text = "\n\nPrevious hints (don't repeat):\n" + "\n".join([f"- {h[:200]}" for i, h in enumerate(previous_hints) if h])
-        
-        prompt = f"""You are a helpful Python tutor. Provide progressive code hints to guide the user to a working solution.
-
-Problem: {problem_title}
-Description: {problem_description}
-Starter code (preserve exact signature):
-```python
-{starter_code}
-```
-{user_code_context}
-{previous_hints_text}
-
-Generate Hint Level {hint_level}:
-{hint_guidance[hint_level]}
-
-Rules:
-1. Output only Python code, no explanations or markdown code fences.
-2. Use TODO comments or simple comments to show what's missing - don't use ??? which breaks syntax.
-3. Keep code syntactically valid - use pass or return "" for missing parts.
-4. Add comments sparingly - only for key insights, not everywhere.
-5. Make the hint build on previous hints if they exist.
-6. Consider edge cases in your hints: empty inputs, single elements, duplicates, boundary values.
-7. If user code exists and fails tests, help them fix the specific issue rather than starting over.
-
-Example format for TODO:
-    # TODO: implement core logic here
-    or
-    # HINT: check if value already exists
-
-Output only the Python code (no ```python``` wrapper)."""
-        
-        return prompt
+            self.wfile.flush()
+            log.exception("Hint failed")
 
     def update_progress(self):
         """Update user progress."""
         global progress
 
-        content_length = int(self.headers.get("Content-Length", 0))
-        if content_length == 0:
-            self.send_json({"error": "No content"}, 400)
-            return
-
-        post_data = self.rfile.read(content_length)
-        try:
-            data = json.loads(post_data.decode("utf-8"))
-        except json.JSONDecodeError:
-            self.send_json({"error": "Invalid JSON"}, 400)
+        data = self.read_json_body()
+        if data is None:
             return
 
         action = data.get("action")
@@ -978,17 +1343,22 @@ Output only the Python code (no ```python``` wrapper)."""
         if action == "mark_solved":
             code = data.get("code", "")
             if problem_id:
-                progress.setdefault("solved", {})[problem_id] = {
-                    "code": code,
-                    "timestamp": __import__("datetime").datetime.now().isoformat(),
-                    "passed": True
-                }
-                save_progress(progress)
+                with progress_lock:
+                    progress["solved"][problem_id] = {
+                        "code": code,
+                        "timestamp": datetime.now().isoformat(),
+                        "passed": True
+                    }
+                    record_progress_change(("solved", problem_id), progress["solved"][problem_id])
+                # Solving a problem is the one update users expect to survive a crash
+                save_progress(progress, flush=True)
             self.send_json({"success": True, "progress": progress})
 
         elif action == "mark_unsolved":
-            if problem_id and problem_id in progress.get("solved", {}):
-                del progress["solved"][problem_id]
+            if problem_id and problem_id in progress["solved"]:
+                with progress_lock:
+                    progress["solved"].pop(problem_id, None)
+                    record_progress_change(("solved", problem_id))
                 save_progress(progress)
             self.send_json({"success": True, "progress": progress})
 
@@ -996,10 +1366,17 @@ Output only the Python code (no ```python``` wrapper)."""
             # Auto-save code without changing solved status
             code = data.get("code", "")
             if problem_id:
-                # Only save if problem is already solved or has previous saved code
-                if problem_id in progress.get("solved", {}):
-                    progress["solved"][problem_id]["code"] = code
-                    progress["solved"][problem_id]["timestamp"] = __import__("datetime").datetime.now().isoformat()
+                # Only save if problem is already solved or has previous saved code.
+                # Editors auto-save on every pause, so unchanged code is skipped.
+                with progress_lock:
+                    # Looked up under the lock: a concurrent mark_unsolved may remove it
+                    entry = progress["solved"].get(problem_id)
+                    changed = entry is not None and entry.get("code") != code
+                    if changed:
+                        entry["code"] = code
+                        entry["timestamp"] = datetime.now().isoformat()
+                        record_progress_change(("solved", problem_id), entry)
+                if changed:
                     save_progress(progress)
             self.send_json({"success": True, "progress": progress})
 
@@ -1008,10 +1385,12 @@ Output only the Python code (no ```python``` wrapper)."""
             passed = data.get("passed", False)
 
             if problem_id:
-                progress.setdefault("submissions", {})[problem_id] = {
-                    "code": code,
-                    "passed": passed,
-                }
+                with progress_lock:
+                    progress["submissions"][problem_id] = {
+                        "code": code,
+                        "passed": passed,
+                    }
+                    record_progress_change(("submissions", problem_id), progress["submissions"][problem_id])
                 save_progress(progress)
 
             self.send_json({"success": True, "progress": progress})
@@ -1021,94 +1400,81 @@ Output only the Python code (no ```python``` wrapper)."""
 
     def get_roadmap_progress(self):
         """Get roadmap progress."""
-        roadmap_progress = progress.get("roadmap", {
-            "currentDay": 1,
-            "currentPhase": 1,
-            "completedDays": [],
-            "unlockedPhases": [1]
-        })
-        self.send_json(roadmap_progress)
+        self.send_json(progress["roadmap"])
 
     def update_roadmap_progress(self):
-        """Update roadmap progress."""
-        global progress
+        """Update roadmap progress.
 
-        content_length = int(self.headers.get("Content-Length", 0))
-        if content_length == 0:
-            self.send_json({"error": "No content"}, 400)
+        Actions: complete_day {"day": n}, complete_days {"days": [n, ...]} and
+        set_day {"day": n}. complete_days applies the days in ascending order
+        as if each were sent separately, but with one response and one save.
+        """
+        data = self.read_json_body()
+        if data is None:
             return
 
-        post_data = self.rfile.read(content_length)
-        try:
-            data = json.loads(post_data.decode("utf-8"))
-        except json.JSONDecodeError:
-            self.send_json({"error": "Invalid JSON"}, 400)
+        action = data.get("action")
+        handler = self.ROADMAP_ACTIONS.get(action) if isinstance(action, str) else None
+        if handler is None:
+            self.send_json({"error": "Unknown action"}, 400)
             return
+        handler(self, progress["roadmap"], data)
 
-        # Initialize roadmap progress if not exists
-        if "roadmap" not in progress:
-            progress["roadmap"] = {
-                "currentDay": 1,
-                "currentPhase": 1,
-                "completedDays": [],
-                "unlockedPhases": [1]
-            }
+    def _roadmap_complete_day(self, roadmap, data):
+        day = _as_int(data.get("day"), 1, ROADMAP_DAYS)
+        if day is None:
+            self.send_json({"error": "Invalid day"}, 400)
+            return
 
-        roadmap = progress["roadmap"]
-        action = data.get("action")
+        with progress_lock:
+            # Double clicks and resends on tab focus repeat an already completed day
+            changed = complete_roadmap_day(roadmap, day)
+            if changed:
+                record_progress_change(("roadmap",), roadmap)
+
+        if changed:
+            save_progress(progress)
+        self.send_json({"success": True, "progress": roadmap})
+
+    def _roadmap_complete_days(self, roadmap, data):
+        days = data.get("days")
+        if isinstance(days, list) and days:
+            days = {_as_int(day, 1, ROADMAP_DAYS) for day in days}
+        if not isinstance(days, set) or None in days:
+            self.send_json({"error": "Invalid days"}, 400)
+            return
 
-        if action == "complete_day":
-            day = data.get("day")
-            if day is not None:
-                if day not in roadmap["completedDays"]:
-                    roadmap["completedDays"].append(day)
-                    roadmap["completedDays"].sort()
-
-                # Auto-advance current day
-                if roadmap["currentDay"] == day:
-                    roadmap["currentDay"] = day + 1
-
-                    # Check if phase is complete and unlock next phase
-                    if roadmap["currentDay"] > 15 and roadmap["currentPhase"] == 1:
-                        roadmap["currentPhase"] = 2
-                        if 2 not in roadmap["unlockedPhases"]:
-                            roadmap["unlockedPhases"].append(2)
-                    elif roadmap["currentDay"] > 30 and roadmap["currentPhase"] == 2:
-                        roadmap["currentPhase"] = 3
-                        if 3 not in roadmap["unlockedPhases"]:
-                            roadmap["unlockedPhases"].append(3)
-                    elif roadmap["currentDay"] > 45 and roadmap["currentPhase"] == 3:
-                        roadmap["currentPhase"] = 4
-                        if 4 not in roadmap["unlockedPhases"]:
-                            roadmap["unlockedPhases"].append(4)
+        with progress_lock:
+            changed = False
+            for day in sorted(days):
+                changed |= complete_roadmap_day(roadmap, day)
+            if changed:
+                record_progress_change(("roadmap",), roadmap)
+
+        if changed:
+            save_progress(progress)
+        self.send_json({"success": True, "progress": roadmap})
+
+    def _roadmap_set_day(self, roadmap, data):
+        day = _as_int(data.get("day"), 1, ROADMAP_DAYS)
+        if day is None:
+            self.send_json({"error": "Invalid day"}, 400)
+            return
 
-                save_progress(progress)
-                self.send_json({"success": True, "progress": roadmap})
-            else:
-                self.send_json({"error": "Day not provided"}, 400)
-
-        elif action == "set_day":
-            day = data.get("day")
-            if day is not None and 1 <= day <= 60:
-                roadmap["currentDay"] = day
-
-                # Update phase based on day
-                if day <= 15:
-                    roadmap["currentPhase"] = 1
-                elif day <= 30:
-                    roadmap["currentPhase"] = 2
-                elif day <= 45:
-                    roadmap["currentPhase"] = 3
-                else:
-                    roadmap["currentPhase"] = 4
+        with progress_lock:
+            roadmap["currentDay"] = day
+            roadmap["currentPhase"] = phase_for_day(day)
+            record_progress_change(("roadmap",), roadmap)
 
-                save_progress(progress)
-                self.send_json({"success": True, "progress": roadmap})
-            else:
-                self.send_json({"error": "Invalid day"}, 400)
+        save_progress(progress)
+        self.send_json({"success": True, "progress": roadmap})
 
-        else:
-            self.send_json({"error": "Unknown action"}, 400)
+    # action -> handler(self, roadmap, data); each handler sends its own response
+    ROADMAP_ACTIONS = {
+        "complete_day": _roadmap_complete_day,
+        "complete_days": _roadmap_complete_days,
+        "set_day": _roadmap_set_day,
+    }
 
     def handle_quiz(self):
         """Handle quiz requests (GET for existing, POST to generate)."""
@@ -1140,16 +1506,8 @@ Output only the Python code (no ```python``` wrapper)."""
         """Generate quiz for a problem using AI with structured output."""
         global quizzes
 
-        content_length = int(self.headers.get("Content-Length", 0))
-        if content_length == 0:
-            self.send_json({"error": "No content"}, 400)
-            return
-
-        post_data = self.rfile.read(content_length)
-        try:
-            data = json.loads(post_data.decode("utf-8"))
-        except json.JSONDecodeError:
-            self.send_json({"error": "Invalid JSON"}, 400)
+        data = self.read_json_body()
+        if data is None:
             return
 
         problem_id = data.get("problem_id")
@@ -1227,15 +1585,8 @@ Do not include markdown code fences, comments, or extra text. Return ONLY the JS
                 self.send_json({"error": "OpenRouter API key not configured"}, 500)
                 return
 
-            response = requests.post(
-                url="https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                    "Content-Type": "application/json",
-                    "HTTP-Referer": "http://localhost:8888",
-                    "X-Title": "LeetCode Helper"
-                },
-                json={
+            response = openrouter_post(
+                {
                     "model": AURORA_MODEL,
                     "messages": [
                         {"role": "system", "content": "You are a helpful Python tutor creating quizzes for coding problems."},
@@ -1280,7 +1631,7 @@ Do not include markdown code fences, comments, or extra text. Return ONLY the JS
                     },
                     "max_tokens": 3000,
                 },
-                timeout=60
+                timeout=60,
             )
 
             if response.status_code != 200:
@@ -1290,7 +1641,7 @@ Do not include markdown code fences, comments, or extra text. Return ONLY the JS
                 }, 500)
                 return
 
-            result = response.json()
+            result = decode_json(response.content)
             content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
 
             if not content:
@@ -1299,7 +1650,7 @@ Do not include markdown code fences, comments, or extra text. Return ONLY the JS
 
             # Parse JSON from response
             try:
-                quiz_json = json.loads(content)
+                quiz_json = decode_json(content)
             except json.JSONDecodeError as e:
                 print(f"[QUIZ] Failed to parse JSON: {e}")
                 self.send_json({"error": "AI returned invalid JSON"}, 500)
@@ -1314,7 +1665,7 @@ Do not include markdown code fences, comments, or extra text. Return ONLY the JS
             # Save quiz (even if not exactly 5 questions, accept what we get)
             quiz_data = {
                 "questions": quiz_json["questions"],
-                "generated_at": __import__("datetime").datetime.now().isoformat()
+                "generated_at": datetime.now().isoformat()
             }
 
             quizzes[problem_id] = quiz_data
@@ -1333,20 +1684,36 @@ Do not include markdown code fences, comments, or extra text. Return ONLY the JS
                 "success": True
             })
 
-        except requests.exceptions.Timeout:
+        except OpenRouterBusy as e:
+            self.send_json({"error": str(e)}, 503, headers={"Retry-After": OPENROUTER_RETRY_AFTER})
+        except RequestTimeout:
             self.send_json({"error": "Request timed out. Please try again."}, 504)
         except Exception as e:
-            import traceback
-            traceback.print_exc()
+            # Reply first; formatting the traceback can wait
             self.send_json({"error": f"Server error: {str(e)}"}, 500)
+            self.wfile.flush()
+            log.exception("Quiz generation failed")
 
     def log_message(self, format, *args):
         """Suppress default logging."""
         pass
 
 
-def main():
-    """Start the server."""
+class ThreadedHTTPServer(http.server.ThreadingHTTPServer):
+    """Threaded HTTP server for concurrent requests."""
+    daemon_threads = True
+    allow_reuse_address = True
+    # Each slow AI call occupies a handler thread; the default listen backlog
+    # of 5 made the browser's parallel API calls queue or get refused.
+    request_queue_size = 128
+
+
+class StartupError(Exception):
+    """The project is missing files the server cannot run without."""
+
+
+def check_startup_files():
+    """Create the data directories and make sure the dataset and UI are in place."""
     # Ensure directories exist
     DATA_DIR.mkdir(exist_ok=True)
     STATIC_DIR.mkdir(exist_ok=True)
@@ -1354,21 +1721,66 @@ def main():
     # Check for problems.json
     problems_file = DATA_DIR / "problems.json"
     if not problems_file.exists():
-        print("Error: problems.json not found!")
-        print("Run 'python merge_dataset.py' first to create the dataset.")
-        sys.exit(1)
+        raise StartupError(
+            "Error: problems.json not found!\n"
+            "Run 'python merge_dataset.py' first to create the dataset."
+        )
 
     # Check static files
     if not (STATIC_DIR / "index.html").exists():
-        print("Error: static/index.html not found!")
-        sys.exit(1)
+        raise StartupError("Error: static/index.html not found!")
+
+
+def create_server(port=PORT):
+    """Prepare the shared data and bind the HTTP server; the caller runs serve_forever.
+
+    Raises StartupError if the dataset or the web UI is missing. Call
+    flush_progress(compact=True) after the server stops.
+    """
+    check_startup_files()
+    load_shared_data()
 
-    class ThreadedHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
-        """Threaded HTTP server for concurrent requests."""
-        daemon_threads = True
-        allow_reuse_address = True
+    # Fold any change log left by the last run back into progress.json
+    if PROGRESS_LOG_FILE.exists():
+        flush_progress(compact=True)
 
-    server = ThreadedHTTPServer(("", PORT), LeetCodeHandler)
+    # Parse the dataset in the background so the first problem view doesn't wait on it
+    threading.Thread(target=get_problem_index, daemon=True).start()
+
+    return ThreadedHTTPServer(("", port), LeetCodeHandler)
+
+
+class _RecordQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records as they are; the stock prepare() formats on the caller's thread."""
+
+    def prepare(self, record):
+        return record
+
+
+def start_log_listener():
+    """Send log records through a queue; a listener thread formats and writes them.
+
+    Handler threads only enqueue the record, so a traceback is never formatted
+    or written to stderr on the thread that is serving a client.
+    """
+    records = queue.SimpleQueue()
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    listener = logging.handlers.QueueListener(records, console)
+    logging.basicConfig(level=logging.INFO, handlers=[_RecordQueueHandler(records)])
+    listener.start()
+    return listener
+
+
+def main():
+    """Start the server."""
+    listener = start_log_listener()
+    try:
+        server = create_server()
+    except StartupError as e:
+        print(e)
+        listener.stop()
+        sys.exit(1)
     print(f"\n" + "=" * 50)
     print(f"  LeetCode Helper")
     print(f"=" * 50)
@@ -1381,6 +1793,9 @@ def main():
     except KeyboardInterrupt:
         print("\n\nShutting down server...")
         server.shutdown()
+    finally:
+        flush_progress(compact=True)
+        listener.stop()
 
 
 if __name__ == "__main__":
@@ -1290,6 +1290,8 @@ class LeetCodeApp {
         this.hintLevel = 0;
         this.viewingHintLevel = 0;
         this.currentHints = [];
+        // Problems whose AI solution was already shown; asking again regenerates
+        this.aiSolutionTitles = new Set();
 
         this.init();
     }
@@ -2052,7 +2054,9 @@ class LeetCodeApp {
                     problem_title: problemTitle,
                     problem_description: problemDescription.substring(0, 3000),
                     test_cases: testCases.slice(0, 3),
-                    starter_code: starterCode
+                    starter_code: starterCode,
+                    // The server reuses a stored answer unless asked for a new one
+                    regenerate: this.aiSolutionTitles.has(problemTitle)
                 })
             });
 
@@ -2085,6 +2089,7 @@ class LeetCodeApp {
                 }
 
                 this._currentProblemTitle = problemTitle;
+                this.aiSolutionTitles.add(problemTitle);
 
                 const useBtn = document.getElementById('copyToEditorBtn');
                 if (useBtn && codeMatch) {
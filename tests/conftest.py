@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# server.py and leetcode_helper live at the repository root; server.py also
+# resolves data/ and static/ against the working directory, so run from there.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
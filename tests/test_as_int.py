@@ -0,0 +1,33 @@
+"""Tests for _as_int, which validates numeric fields in request JSON."""
+import pytest
+
+import server
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (3, 3),
+        ("3", 3),
+        (" 3 ", 3),
+        (3.0, 3),
+        (3.5, None),
+        (True, None),
+        (False, None),
+        (None, None),
+        ("", None),
+        ("three", None),
+        ("3.0", None),
+        ([3], None),
+        ({"day": 3}, None),
+        (float("inf"), None),
+        (float("nan"), None),
+    ],
+)
+def test_as_int_types(value, expected):
+    assert server._as_int(value) == expected
+
+
+@pytest.mark.parametrize("value, expected", [(0, None), (1, 1), (60, 60), (61, None), ("61", None), (-1, None)])
+def test_as_int_range(value, expected):
+    assert server._as_int(value, 1, server.ROADMAP_DAYS) == expected
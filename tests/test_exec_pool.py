@@ -0,0 +1,83 @@
+"""Regression tests for the /api/run worker pool."""
+import http.client
+import json
+import threading
+
+import pytest
+
+import server
+from leetcode_helper.executor import WorkerDied, WorkerPool, execute_test
+
+LOOP_CODE = "class Solution:\n    def solve(self, x):\n        while True:\n            pass\n"
+ECHO_CODE = "class Solution:\n    def solve(self, x):\n        return x\n"
+
+
+@pytest.fixture
+def httpd(monkeypatch):
+    monkeypatch.setattr(server, "TEST_TIMEOUT", 1)
+    pool = WorkerPool(max_workers=2)
+    monkeypatch.setattr(server, "_exec_pool", pool)
+    httpd = server.ThreadedHTTPServer(("127.0.0.1", 0), server.LeetCodeHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    pool.close()
+
+
+def post_run(port, code, results):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    body = json.dumps({"code": code, "problem_id": "no-such-problem", "test_cases": [["1"]]})
+    conn.request("POST", "/api/run", body=body, headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    results.append((code, response.status, json.loads(response.read())))
+
+
+def run_concurrently(port, codes):
+    results = []
+    threads = [threading.Thread(target=post_run, args=(port, code, results)) for code in codes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    assert len(results) == len(codes)
+    return results
+
+
+def test_concurrent_timeouts_share_one_pool(httpd):
+    for _, status, payload in run_concurrently(httpd.server_address[1], [LOOP_CODE, LOOP_CODE]):
+        assert status == 200
+        assert payload["passed"] == 0
+        assert payload["results"][0]["error"] == "Time Limit Exceeded (1s)"
+
+
+def test_timeout_does_not_interrupt_other_runs(httpd):
+    results = run_concurrently(httpd.server_address[1], [LOOP_CODE, ECHO_CODE, ECHO_CODE])
+    for code, status, payload in results:
+        assert status == 200
+        assert payload["passed"] == (0 if code == LOOP_CODE else 1)
+
+
+def test_time_waiting_for_a_worker_is_not_billed(httpd):
+    # One worker: the quick run queues behind the loop for the whole time limit.
+    server._exec_pool.max_workers = 1
+    results = run_concurrently(httpd.server_address[1], [LOOP_CODE, ECHO_CODE])
+    assert {code: payload["passed"] for code, _, payload in results} == {LOOP_CODE: 0, ECHO_CODE: 1}
+
+
+def test_worker_exit_is_reported_and_replaced():
+    pool = WorkerPool(max_workers=1)
+    try:
+        exit_code = "import os\nclass Solution:\n    def solve(self, x):\n        os._exit(3)\n"
+        with pytest.raises(WorkerDied):
+            pool.run((exit_code, "1", "Solution", None), timeout=5)
+        assert pool.run((ECHO_CODE, "1", "Solution", None), timeout=5)["passed"]
+    finally:
+        pool.close()
+
+
+def test_exit_in_user_code_is_a_failed_test():
+    code = "class Solution:\n    def solve(self, x):\n        exit(2)\n"
+    result = execute_test(code, "1", "Solution", None)
+    assert not result["passed"]
+    assert result["error"] == "SystemExit(2)"
@@ -0,0 +1,46 @@
+"""Tests for the shared problems.json index in problem_store."""
+import json
+import os
+import pickle
+
+import pytest
+
+from leetcode_helper import problem_store
+
+PROBLEMS = [
+    {"id": 1, "title": "Two Sum", "solutions": ["..."]},
+    {"frontend_id": "2", "title": "Add Two Numbers"},
+]
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    (tmp_path / "problems.json").write_text(json.dumps(PROBLEMS))
+    yield tmp_path
+    problem_store._CACHE.clear()
+
+
+def test_index_drops_unused_fields(data_dir):
+    index = problem_store.load_problem_index(data_dir)
+    assert sorted(index) == ["1", "2"]
+    assert "solutions" not in index["1"]
+    assert problem_store.load_problem(2, data_dir)["title"] == "Add Two Numbers"
+
+
+def test_pickle_is_reused_until_the_dataset_changes(data_dir):
+    problem_store.load_problem_index(data_dir)
+    assert (data_dir / "problems.pkl").exists()
+
+    problem_store._CACHE.clear()
+    (data_dir / "problems.pkl").write_bytes(pickle.dumps({"1": {"title": "from pickle"}}))
+    assert problem_store.load_problem(1, data_dir)["title"] == "from pickle"
+
+    problem_store._CACHE.clear()
+    stale = os.stat(data_dir / "problems.pkl").st_mtime - 10
+    os.utime(data_dir / "problems.pkl", (stale, stale))
+    assert problem_store.load_problem(1, data_dir)["title"] == "Two Sum"
+
+
+def test_missing_problem(data_dir):
+    with pytest.raises(KeyError):
+        problem_store.load_problem(3, data_dir)
@@ -0,0 +1,121 @@
+"""Tests for progress persistence: the change log, its replay and compaction."""
+import threading
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def progress_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "PROGRESS_FILE", tmp_path / "progress.json")
+    monkeypatch.setattr(server, "PROGRESS_LOG_FILE", tmp_path / "progress_log.jsonl")
+    monkeypatch.setattr(server, "_pending_progress_changes", [])
+    return tmp_path
+
+
+class _ClearedByWriter(threading.Event):
+    """A dirty flag the background writer clears right after it is set."""
+
+    def set(self):
+        pass
+
+
+def test_flush_save_writes_even_when_not_marked_dirty(progress_files, monkeypatch):
+    monkeypatch.setattr(server, "_progress_dirty", _ClearedByWriter())
+    progress = server.load_progress()
+    with server.progress_lock:
+        progress["solved"]["1"] = {"code": "x", "passed": True}
+        server.record_progress_change(("solved", "1"), progress["solved"]["1"])
+    server.save_progress(progress, flush=True)
+    assert server.load_progress()["solved"] == {"1": {"code": "x", "passed": True}}
+
+
+def test_writer_survives_a_failed_write(progress_files, monkeypatch):
+    monkeypatch.setattr(server, "PROGRESS_SAVE_DELAY", 0)
+    monkeypatch.setattr(server, "progress", server.load_progress())
+    real_write = server.write_progress
+    failed = threading.Event()
+    written = threading.Event()
+
+    def flaky_write(progress, compact=False):
+        if not failed.is_set():
+            failed.set()
+            raise RuntimeError("not serializable")
+        real_write(progress, compact)
+        written.set()
+
+    monkeypatch.setattr(server, "write_progress", flaky_write)
+    server.save_progress(server.progress)
+    assert failed.wait(5)
+    # Only written if the thread outlived the first failure
+    server.save_progress(server.progress)
+    assert written.wait(5)
+
+
+def record(progress, path, value=server._REMOVED):
+    with server.progress_lock:
+        target = progress
+        for part in path[:-1]:
+            target = target[part]
+        if value is server._REMOVED:
+            target.pop(path[-1], None)
+        else:
+            target[path[-1]] = value
+        server.record_progress_change(path, value)
+
+
+def test_log_replays_changes_and_removals(progress_files):
+    progress = server.load_progress()
+    record(progress, ("solved", "1"), {"code": "a", "passed": True})
+    record(progress, ("solved", "2"), {"code": "b", "passed": True})
+    record(progress, ("hints", "1"), {"hints": ["h"], "revealed": 0})
+    record(progress, ("solved", "1"))
+    server.write_progress(progress)
+
+    assert not server.PROGRESS_FILE.exists()
+    assert server.load_progress() == progress
+
+
+def test_torn_last_line_is_ignored(progress_files):
+    progress = server.load_progress()
+    record(progress, ("solved", "1"), {"code": "a", "passed": True})
+    server.write_progress(progress)
+    with server.PROGRESS_LOG_FILE.open("ab") as log:
+        log.write(b'{"path":["solved","2"],"val')
+
+    assert server.load_progress()["solved"] == {"1": {"code": "a", "passed": True}}
+
+
+def test_log_is_folded_into_the_snapshot_once_large(progress_files, monkeypatch):
+    monkeypatch.setattr(server, "PROGRESS_LOG_COMPACT_BYTES", 200)
+    progress = server.load_progress()
+    record(progress, ("solved", "1"), {"code": "a", "passed": True})
+    server.write_progress(progress)
+    assert server.PROGRESS_LOG_FILE.exists()
+
+    record(progress, ("solved", "2"), {"code": "x" * 200, "passed": True})
+    server.write_progress(progress)
+    assert not server.PROGRESS_LOG_FILE.exists()
+    assert server.load_progress() == progress
+
+    # Later changes start a new log on top of the snapshot
+    record(progress, ("solved", "2"))
+    server.write_progress(progress)
+    assert server.PROGRESS_LOG_FILE.exists()
+    assert server.load_progress() == progress
+
+
+def test_int_problem_ids_replay_as_string_keys(progress_files):
+    progress = server.load_progress()
+    record(progress, ("solved", 1), {"code": "a", "passed": True})
+    server.write_progress(progress)
+    assert server.load_progress()["solved"] == {"1": {"code": "a", "passed": True}}
+
+    progress = server.load_progress()
+    record(progress, ("solved", "1"), {"code": "b", "passed": True})
+    record(progress, ("submissions", 7), {"code": "c", "passed": False})
+    server.write_progress(progress, compact=True)
+    reloaded = server.load_progress()
+    assert reloaded["solved"] == {"1": {"code": "b", "passed": True}}
+    assert reloaded["submissions"] == {"7": {"code": "c", "passed": False}}
@@ -0,0 +1,63 @@
+"""Tests for the /api/roadmap/progress actions."""
+import http.client
+import json
+import threading
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def port(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "PROGRESS_FILE", tmp_path / "progress.json")
+    monkeypatch.setattr(server, "PROGRESS_LOG_FILE", tmp_path / "progress_log.jsonl")
+    monkeypatch.setattr(server, "_pending_progress_changes", [])
+    monkeypatch.setattr(server, "progress", server.load_progress())
+    httpd = server.ThreadedHTTPServer(("127.0.0.1", 0), server.LeetCodeHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+    # Write pending saves here, not to the real data/ once the paths are restored
+    server.flush_progress()
+
+
+def post(port, body):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request("POST", "/api/roadmap/progress", body=json.dumps(body), headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def test_complete_days_applies_days_in_ascending_order(port):
+    status, payload = post(port, {"action": "complete_days", "days": [3, 1, 2]})
+    assert status == 200
+    assert payload["progress"]["currentDay"] == 4
+    assert payload["progress"]["completedDays"] == [1, 2, 3]
+
+
+def test_complete_days_matches_completing_each_day(port):
+    days = list(range(1, 16)) + [20]
+    _, batched = post(port, {"action": "complete_days", "days": days[::-1]})
+
+    server.progress["roadmap"] = server.default_roadmap()
+    for day in days:
+        _, single = post(port, {"action": "complete_day", "day": day})
+    assert batched["progress"] == single["progress"]
+    assert single["progress"]["currentDay"] == 16
+    assert single["progress"]["unlockedPhases"] == [1, 2]
+
+
+@pytest.mark.parametrize("days", [[], "1", [0], [61], [True], [1, "x"], [1.5], None])
+def test_complete_days_rejects_invalid_days(port, days):
+    status, payload = post(port, {"action": "complete_days", "days": days})
+    assert status == 400
+    assert payload == {"error": "Invalid days"}
+    assert server.progress["roadmap"] == server.default_roadmap()
+
+
+def test_complete_days_accepts_numeric_strings_and_repeats(port):
+    status, payload = post(port, {"action": "complete_days", "days": ["2", 1, 2.0]})
+    assert status == 200
+    assert payload["progress"]["completedDays"] == [1, 2]
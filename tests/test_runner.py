@@ -0,0 +1,68 @@
+"""Tests for picking the method execute_code calls."""
+import pytest
+
+from leetcode_helper.runner import compare_results, execute_code, get_method_name
+
+STARTER = "class Solution:\n    def maxValue(self, nums: List[int]) -> int:\n"
+
+SOLUTION = """class Solution:
+    def helper(self, nums):
+        return -1
+
+    def maxValue(self, nums):
+        return max(nums)
+"""
+
+
+def test_get_method_name_reads_starter():
+    assert get_method_name(STARTER) == "maxValue"
+
+
+def test_entry_method_comes_from_starter():
+    # The frontend always sends "solve", which the class does not define.
+    assert execute_code(SOLUTION, "[1, 5, 3]", "Solution", "solve", STARTER) == 5
+
+
+def test_explicit_function_name_wins():
+    assert execute_code(SOLUTION, "[1, 5, 3]", "Solution", "helper", STARTER) == -1
+
+
+def test_without_starter_falls_back_to_definition_order():
+    assert execute_code(SOLUTION, "[1, 5, 3]", "Solution", "solve") == -1
+
+
+def test_fallback_skips_nested_classes():
+    code = """class Solution:
+    class Node:
+        def __init__(self, val=0):
+            self.val = val
+
+    @classmethod
+    def total(cls, nums):
+        return sum(nums)
+"""
+    assert execute_code(code, "[1, 5, 3]", "Solution", "solve") == 9
+
+
+@pytest.mark.parametrize(
+    "actual, expected, same",
+    [
+        # bool == int, so these are the same multiset under ==
+        ([1, True], [True, 1], True),
+        ([1, True], [1, 1], True),
+        ([1, True], [1, 2], False),
+        # Lists of lists ignore both outer and inner order
+        ([[1], [2]], [[2], [1]], True),
+        ([[1, 2], [3]], [[3], [2, 1]], True),
+        ([[1], [2]], [[1], [3]], False),
+        # Numbers: 1 == 1.0; the float tolerance applies only in order
+        ([1.0, 2], [2, 1], True),
+        ([0.1 + 0.2, 1], [0.3, 1], True),
+        ([0.1 + 0.2, 1], [1, 0.3], False),
+        # Hashable but unorderable mixes match their permutations
+        ([1, "a"], ["a", 1], True),
+        ([None, 1], [1, 1], False),
+    ],
+)
+def test_compare_results_lists(actual, expected, same):
+    assert compare_results(actual, expected) is same
@@ -0,0 +1,85 @@
+"""Tests for static file ETags and 304 responses, including the gzip variant."""
+import gzip
+import http.client
+import os
+import threading
+
+import pytest
+
+import server
+
+SCRIPT = b"function hello() { return 'hello'; }\n" * 50
+
+
+@pytest.fixture
+def port(tmp_path, monkeypatch):
+    (tmp_path / "app.js").write_bytes(SCRIPT)
+    (tmp_path / "big.js").write_bytes(SCRIPT * 4)
+    monkeypatch.setattr(server, "STATIC_DIR", tmp_path)
+    monkeypatch.setattr(server, "STATIC_CACHE_MAX_BYTES", len(SCRIPT) * 2)
+    httpd = server.ThreadedHTTPServer(("127.0.0.1", 0), server.LeetCodeHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get(port, path, **headers):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request("GET", path, headers=headers)
+    response = conn.getresponse()
+    return response, response.read()
+
+
+def test_revalidation_with_etag(port):
+    response, body = get(port, "/static/app.js")
+    assert response.status == 200 and body == SCRIPT
+    etag = response.getheader("ETag")
+
+    for header in (etag, "W/" + etag, '"other", ' + etag, "*"):
+        response, body = get(port, "/static/app.js", **{"If-None-Match": header})
+        assert response.status == 304
+        assert body == b""
+        assert response.getheader("ETag") == etag
+
+    response, _ = get(port, "/static/app.js", **{"If-None-Match": '"other"'})
+    assert response.status == 200
+
+
+def test_gzip_variant_has_its_own_etag(port):
+    response, body = get(port, "/static/app.js", **{"Accept-Encoding": "gzip"})
+    assert response.status == 200
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert response.getheader("Vary") == "Accept-Encoding"
+    assert gzip.decompress(body) == SCRIPT
+    gz_etag = response.getheader("ETag")
+    assert gz_etag.endswith('-gz"')
+
+    identity_etag = get(port, "/static/app.js")[0].getheader("ETag")
+    assert identity_etag != gz_etag
+
+    # A cached gzip body only revalidates the gzip representation
+    response, _ = get(port, "/static/app.js", **{"If-None-Match": gz_etag})
+    assert response.status == 200
+    response, body = get(port, "/static/app.js", **{"If-None-Match": gz_etag, "Accept-Encoding": "gzip"})
+    assert response.status == 304 and body == b""
+    assert response.getheader("Vary") == "Accept-Encoding"
+
+
+def test_etag_changes_with_the_file(port):
+    etag = get(port, "/static/app.js")[0].getheader("ETag")
+    path = server.STATIC_DIR / "app.js"
+    path.write_bytes(SCRIPT + b"// changed\n")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    response, body = get(port, "/static/app.js", **{"If-None-Match": etag})
+    assert response.status == 200
+    assert body.endswith(b"// changed\n")
+
+
+def test_large_files_revalidate_too(port):
+    response, body = get(port, "/static/big.js")
+    assert response.status == 200 and body == SCRIPT * 4
+    response, body = get(port, "/static/big.js", **{"If-None-Match": response.getheader("ETag")})
+    assert response.status == 304 and body == b""
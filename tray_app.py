@@ -2,11 +2,7 @@
 LeetCode Helper - System Tray Application
 A lightweight system tray app that runs the LeetCode Helper server.
 """
-import subprocess
-import sys
 import threading
-import webbrowser
-from pathlib import Path
 
 import pystray
 from PIL import Image, ImageDraw
@@ -14,9 +10,8 @@ from PIL import Image, ImageDraw
 
 class LeetCodeTrayApp:
     def __init__(self):
-        self.server_process = None
+        self.httpd = None
         self.icon = None
-        self.base_dir = Path(__file__).parent
 
     def create_icon_image(self):
         """Create a simple icon for the system tray."""
@@ -35,35 +30,39 @@ class LeetCodeTrayApp:
         return image
 
     def start_server(self):
-        """Start the LeetCode Helper server."""
-        if self.server_process is not None:
+        """Start the LeetCode Helper server in this process."""
+        if self.httpd is not None:
             return
-        
-        server_script = self.base_dir / "server.py"
-        
-        def run_server():
-            self.server_process = subprocess.Popen(
-                [sys.executable, str(server_script)],
-                cwd=str(self.base_dir),
-                creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
-            )
-            self.server_process.wait()
-        
-        thread = threading.Thread(target=run_server, daemon=True)
+
+        import server
+
+        try:
+            self.httpd = server.create_server()
+        except server.StartupError as e:
+            print(e)
+            return
+        except OSError as e:
+            print(f"Could not start server on port {server.PORT}: {e}")
+            return
+
+        thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
         thread.start()
 
     def stop_server(self):
         """Stop the LeetCode Helper server."""
-        if self.server_process is not None:
-            self.server_process.terminate()
-            try:
-                self.server_process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                self.server_process.kill()
-            self.server_process = None
+        if self.httpd is not None:
+            import server
+
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            server.flush_progress(compact=True)
+            self.httpd = None
 
     def open_browser(self):
         """Open the LeetCode Helper in browser."""
+        # webbrowser probes the platform's browsers on import; only pay for it on click
+        import webbrowser
+
         webbrowser.open('http://localhost:8888')
 
     def quit_app(self, icon=None):